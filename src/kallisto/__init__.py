@@ -1 +1,5 @@
 __version__ = "1.0.10"
+
+from kallisto.features import compute  # noqa: E402
+
+__all__ = ["compute"]
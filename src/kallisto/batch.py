@@ -0,0 +1,116 @@
+# src/kallisto/batch.py
+from functools import partial
+import glob
+import os
+from typing import Iterator, List, Tuple
+
+# File types that are picked up when a directory is given
+structureExtensions = (".xyz", ".coord")
+
+
+def isStructureFile(path: str) -> bool:
+    """Check whether a file is a structure file rather than a manifest."""
+
+    from kallisto.reader.strucreader import getFileType, sniffSize
+
+    name = os.path.basename(path)
+    if name.endswith(structureExtensions) or name == "coord":
+        return True
+
+    with open(path, "r") as fileObject:
+        head = fileObject.read(sniffSize)
+
+    return getFileType(name, head) != "unknown"
+
+
+def getBatchInputs(inp: str) -> List[str]:
+    """Resolve a directory, a glob pattern, or a manifest file into paths.
+
+    Directories contain xyz or Turbomole files, a single structure file
+    (detected by its name or content) is taken as it is, and manifest files
+    list one
+    structure file per line (relative to the manifest, lines starting with #
+    are ignored). The order of the returned paths is deterministic."""
+
+    if os.path.isdir(inp):
+        return sorted(
+            os.path.join(inp, name)
+            for name in os.listdir(inp)
+            if name.endswith(structureExtensions) or name == "coord"
+        )
+
+    if os.path.isfile(inp) and isStructureFile(inp):
+        return [inp]
+
+    if os.path.isfile(inp):
+        root = os.path.dirname(inp)
+        with open(inp, "r") as fileObject:
+            lines = [line.strip() for line in fileObject]
+        return [
+            os.path.join(root, line)
+            for line in lines
+            if line and not line.startswith("#")
+        ]
+
+    return sorted(glob.glob(inp))
+
+
+def getFeatureTable(path: str, features: List[str], charge: int) -> List[str]:
+    """Compute features of one structure file and format them as rows."""
+
+    from kallisto.data import chemical_symbols
+    from kallisto.features import compute
+    from kallisto.reader.strucreader import constructMolecule
+
+    molecule = constructMolecule(geometry=path, out=None)
+    values = compute(molecule, features, charge=charge)
+    at = molecule.get_atomic_numbers()
+
+    rows = []
+    for i in range(molecule.get_number_of_atoms()):
+        columns = [path, str(i), chemical_symbols[at[i]]]
+        for feature in features:
+            value = values[feature][i]
+            if isinstance(value, list):
+                columns.append(",".join(str(v) for v in value) or "-")
+            else:
+                columns.append(repr(float(value)))
+        rows.append("\t".join(columns))
+
+    return rows
+
+
+def getFeatureTableSafe(
+    path: str, features: List[str], charge: int
+) -> Tuple[List[str], str]:
+    """Worker that never raises: returns rows and an error message."""
+
+    try:
+        return getFeatureTable(path, features, charge), ""
+    except Exception as e:  # noqa: B902
+        return [], "{}: {}".format(type(e).__name__, e)
+
+
+def runBatch(
+    paths: List[str], features: List[str], charge: int, jobs: int
+) -> Iterator[Tuple[str, List[str], str]]:
+    """Compute features for all paths, optionally with a process pool.
+
+    Yields (path, rows, error) in input order. A failing structure yields an
+    error message instead of rows and does not abort the run."""
+
+    worker = partial(getFeatureTableSafe, features=features, charge=charge)
+
+    if jobs <= 1:
+        for path in paths:
+            rows, error = worker(path)
+            yield path, rows, error
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(paths) // (4 * jobs))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(worker, paths, chunksize=chunksize)
+        for path, (rows, error) in zip(paths, results, strict=True):
+            yield path, rows, error
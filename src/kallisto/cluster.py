@@ -0,0 +1,89 @@
+# src/kallisto/cluster.py
+from typing import Tuple
+
+import numpy as np
+
+from kallisto.rmsd import getCenteredCoordinates
+from kallisto.rmsd import rmsdFromCentered
+
+
+def getConformerDescriptors(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Rotation-invariant descriptors of centered conformers x (nconf, n, 3).
+
+    Returns the singular values (nconf, 3) of the coordinate matrices, i.e.,
+    square roots of the principal moments, and the distances of all atoms
+    to the centroid (nconf, n)."""
+
+    singular = np.linalg.svd(x, compute_uv=False)
+    radial = np.sqrt(np.einsum("...ij,...ij->...i", x, x))
+
+    return singular, radial
+
+
+def rmsdLowerBounds(
+    singular: np.ndarray, radial: np.ndarray, index: int, candidates: np.ndarray
+) -> np.ndarray:
+    """Lower bounds of the rmsds between conformer index and candidates.
+
+    For centered coordinates x and y and any rotation U
+
+            |x - yU|² ≥ Σk (σk(x) - σk(y))²   (von Neumann trace inequality)
+            |x - yU|² ≥ Σi (|xi| - |yi|)²     (triangle inequality per atom)
+
+    The first one includes the difference of the radii of gyration. Both
+    cost O(n) per pair instead of a full alignment."""
+
+    n = radial.shape[-1]
+    principal = np.sum((singular[candidates] - singular[index]) ** 2, axis=-1)
+    fingerprint = np.sum((radial[candidates] - radial[index]) ** 2, axis=-1)
+
+    return np.sqrt(np.maximum(principal, fingerprint) / n)
+
+
+def clusterConformers(
+    coords: np.ndarray, threshold: float = 0.125
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Group conformers coords(nconf, n, 3) (in Bohr) by an rmsd threshold
+    in Angstrom.
+
+    Greedy leader clustering: conformers are visited in input order (e.g.,
+    sorted by energy) and join the closest representative within the
+    threshold or become a new representative. Pairs whose lower bound
+    exceeds the threshold are rejected without alignment, only the
+    remaining ones get the full quaternion rmsd.
+
+    Returns the indices of the representatives, the cluster label of every
+    conformer, and the number of full rmsd evaluations."""
+
+    x, norms = getCenteredCoordinates(coords)
+    singular, radial = getConformerDescriptors(x)
+
+    nconf = len(x)
+    labels = np.zeros(shape=(nconf,), dtype=int)
+    representatives = np.zeros(shape=(nconf,), dtype=int)
+    nrep = 0
+    evaluations = 0
+
+    for index in range(nconf):
+        leaders = representatives[:nrep]
+        bounds = rmsdLowerBounds(singular, radial, index, leaders)
+        candidates = leaders[bounds <= threshold]
+
+        if len(candidates) > 0:
+            errors, _ = rmsdFromCentered(
+                x[candidates],
+                np.broadcast_to(x[index], x[candidates].shape),
+                norms[candidates],
+                norms[index],
+            )
+            evaluations += len(candidates)
+            closest = np.argmin(errors)
+            if errors[closest] <= threshold:
+                labels[index] = labels[candidates[closest]]
+                continue
+
+        labels[index] = nrep
+        representatives[nrep] = index
+        nrep += 1
+
+    return representatives[:nrep].copy(), labels, evaluations
@@ -20,6 +20,12 @@ class Config(object):
 pass_config = click.make_pass_decorator(Config, ensure=True)
 
 
+def printFrame(config, values, out: click.File):
+    """Print several values (e.g., of one trajectory frame) as a single row."""
+
+    silentPrinter(config.silent, " ".join(str(value) for value in values), out)
+
+
 @click.group(chain=True)
 @click.option("--silent", is_flag=True)
 @click.option("--shift", default=0, type=int, required=False)
@@ -47,6 +53,11 @@ def cli(config, silent: bool, shift: int):
     show_default=True,
     help="Coordination number type (exp, cov, err).",
 )
+@click.option(
+    "--frames",
+    is_flag=True,
+    help="Stream all frames of a multi-frame xyz file (one row per frame).",
+)
 @click.option(
     "--out",
     default="-",
@@ -56,7 +67,7 @@ def cli(config, silent: bool, shift: int):
     help="Write to output file.",
 )
 @click.argument("inp", type=str, default="coord", required=True)
-def cns(config, inp: str, out: click.File, cntype: str):
+def cns(config, inp: str, out: click.File, cntype: str, frames: bool):
     """Atomic coordination numbers."""
 
     # Available CNs
@@ -68,6 +79,11 @@ def cns(config, inp: str, out: click.File, cntype: str):
             )
         )
 
+    if frames:
+        for molecule in ksr.iterMolecules(geometry=inp):
+            printFrame(config, molecule.get_cns(cntype), out)
+        return
+
     molecule = ksr.constructMolecule(geometry=inp, out=out)
     cns = molecule.get_cns(cntype)
     nat = molecule.get_number_of_atoms()
@@ -237,13 +253,54 @@ def sort(config, inp: str, start: str, out: click.File):
     required=False,
     help="Write to output file.",
 )
+@click.option(
+    "--frames",
+    is_flag=True,
+    help="Stream all frames of a multi-frame xyz file (one row per frame).",
+)
+@click.option(
+    "--solver",
+    default="direct",
+    type=str,
+    show_default=True,
+    help="Linear solver (direct, cg).",
+)
+@click.option(
+    "--tol",
+    default=1e-8,
+    type=float,
+    show_default=True,
+    help="Relative residual tolerance of the cg solver.",
+)
 @click.argument("inp", type=str, default="coord", required=True)
-def eeq(config, inp: str, out: click.File, chrg: int):
+def eeq(
+    config,
+    inp: str,
+    out: click.File,
+    chrg: int,
+    frames: bool,
+    solver: str,
+    tol: float,
+):
     """Electronegativity equilibration atomic partial charges."""
 
+    # Available solvers
+    availableSolver = ("direct", "cg")
+    if solver not in availableSolver:
+        errorbye(
+            'EEQ solver "{}" is not implemented. Please use "direct" or "cg"'.format(
+                solver
+            )
+        )
+
+    if frames:
+        for molecule in ksr.iterMolecules(geometry=inp):
+            printFrame(config, molecule.get_eeq(chrg, solver, tol=tol), out)
+        return
+
     molecule = ksr.constructMolecule(geometry=inp, out=out)
     nat = molecule.get_number_of_atoms()
-    eeq = molecule.get_eeq(chrg)
+    eeq = molecule.get_eeq(chrg, solver, tol=tol)
     for i in range(nat):
         silentPrinter(config.silent, eeq[i], out)
 
@@ -268,15 +325,46 @@ def eeq(config, inp: str, out: click.File, chrg: int):
     required=False,
     help="Write to output file.",
 )
+@click.option(
+    "--frames",
+    is_flag=True,
+    help="Stream all frames of a multi-frame xyz file (one row per frame).",
+)
+@click.option(
+    "--frequencies",
+    is_flag=True,
+    help="Dynamic polarizabilities at all 23 imaginary frequencies (one row per atom).",
+)
 @click.argument("inp", type=str, default="coord", required=True)
-def alp(config, inp: str, out: click.File, chrg: int, molecular: bool):
+def alp(
+    config,
+    inp: str,
+    out: click.File,
+    chrg: int,
+    molecular: bool,
+    frames: bool,
+    frequencies: bool,
+):
     """Static atomic polarizabilities in Bohr^3."""
 
+    if frames:
+        for molecule in ksr.iterMolecules(geometry=inp):
+            alp = molecule.get_alp(charge=chrg, dynamic=frequencies)
+            if molecular:
+                alp = np.sum(alp, axis=0)
+            printFrame(config, np.ravel(alp), out)
+        return
+
     molecule = ksr.constructMolecule(geometry=inp, out=out)
     nat = molecule.get_number_of_atoms()
-    alp = molecule.get_alp(charge=chrg)
-    if molecular:
+    alp = molecule.get_alp(charge=chrg, dynamic=frequencies)
+    if molecular and frequencies:
+        printFrame(config, np.sum(alp, axis=0), out)
+    elif molecular:
         silentPrinter(config.silent, np.sum(alp), out)
+    elif frequencies:
+        for i in range(nat):
+            printFrame(config, alp[i], out)
     else:
         for i in range(nat):
             silentPrinter(config.silent, alp[i], out)
@@ -284,6 +372,75 @@ def alp(config, inp: str, out: click.File, chrg: int, molecular: bool):
     return alp
 
 
+@cli.command("c6")
+@pass_config
+@click.option(
+    "--chrg",
+    default=0,
+    type=int,
+    show_default=True,
+    help="Absolute charge of the system.",
+)
+@click.option("--molecular", is_flag=True)
+@click.option(
+    "--out",
+    default="-",
+    type=click.File("w"),
+    show_default=True,
+    required=False,
+    help="Write to output file.",
+)
+@click.argument("inp", type=str, default="coord", required=True)
+def c6(config, inp: str, out: click.File, chrg: int, molecular: bool):
+    """Homoatomic (or molecular) C6 dispersion coefficients in atomic units."""
+
+    molecule = ksr.constructMolecule(geometry=inp, out=out)
+    nat = molecule.get_number_of_atoms()
+    if molecular:
+        silentPrinter(config.silent, molecule.get_molecular_c6(chrg), out)
+        return
+
+    c6 = molecule.get_c6(chrg)
+    for i in range(nat):
+        silentPrinter(config.silent, c6[i, i], out)
+
+    return c6
+
+
+@cli.command("disp")
+@pass_config
+@click.option(
+    "--chrg",
+    default=0,
+    type=int,
+    show_default=True,
+    help="Absolute charge of the system.",
+)
+@click.option("--molecular", is_flag=True)
+@click.option(
+    "--out",
+    default="-",
+    type=click.File("w"),
+    show_default=True,
+    required=False,
+    help="Write to output file.",
+)
+@click.argument("inp", type=str, default="coord", required=True)
+def disp(config, inp: str, out: click.File, chrg: int, molecular: bool):
+    """Atom-resolved (or total) dispersion energies in Hartree."""
+
+    molecule = ksr.constructMolecule(geometry=inp, out=out)
+    nat = molecule.get_number_of_atoms()
+    disp = molecule.get_dispersion(chrg)
+    if molecular:
+        silentPrinter(config.silent, np.sum(disp), out)
+    else:
+        for i in range(nat):
+            silentPrinter(config.silent, disp[i], out)
+
+    return disp
+
+
 @cli.command("vdw")
 @pass_config
 @click.option(
@@ -343,6 +500,11 @@ def vdw(config, inp: str, out: click.File, chrg: int, vdwtype: str, angstrom: bo
 
 @cli.command("rms")
 @pass_config
+@click.option(
+    "--reorder",
+    is_flag=True,
+    help="Assign atoms of the second structure (atom ordering may differ).",
+)
 @click.option(
     "--out",
     default="-",
@@ -352,7 +514,7 @@ def vdw(config, inp: str, out: click.File, chrg: int, vdwtype: str, angstrom: bo
     help="Write to output file.",
 )
 @click.argument("inp", type=(str, str), default=("coord1", "coord2"), required=True)
-def rms(config, inp: Tuple[str, str], out: click.File):
+def rms(config, inp: Tuple[str, str], out: click.File, reorder: bool):
     """Calculate the root mean squared deviation between two structures using quaternions.
     Based on a Fortran implementation by Chaok Seok, Evangelos
     Coutsias, and Ken Dill."""
@@ -372,6 +534,20 @@ def rms(config, inp: Tuple[str, str], out: click.File):
             ),
         )
 
+    if reorder:
+        from kallisto.rmsd import rmsdReorder
+
+        try:
+            error, u, perm = rmsdReorder(mol1, mol2)
+        except ValueError as e:
+            errorbye(str(e))
+        silentPrinter(config.silent, "RMSD {} Angstrom".format(error), out)
+        silentPrinter(config.silent, "Rotation Matrix", out)
+        click.echo(u, file=out)  # type: ignore
+        silentPrinter(config.silent, "Assignment", out)
+        printFrame(config, perm, out)
+        return error, u, perm
+
     coord1 = mol1.get_positions()
     coord2 = mol2.get_positions()
 
@@ -385,15 +561,167 @@ def rms(config, inp: Tuple[str, str], out: click.File):
     return error, u
 
 
+@cli.command("rmsmat")
+@pass_config
+@click.option(
+    "--jobs",
+    default=1,
+    type=int,
+    show_default=True,
+    help="Number of worker processes.",
+)
+@click.option(
+    "--matrix",
+    default="rmsd.npy",
+    type=str,
+    show_default=True,
+    help="Condensed RMSD matrix (memory-mapped .npy file).",
+)
+@click.option(
+    "--out",
+    default="-",
+    type=click.File("w"),
+    show_default=True,
+    required=False,
+    help="Write to output file.",
+)
+@click.argument("inp", type=str, required=True)
+def rmsmat(config, inp: str, jobs: int, matrix: str, out: click.File):
+    """All pairwise root mean squared deviations of a multi-frame file.
+    The condensed matrix is stored in the order of scipy's pdist."""
+
+    from kallisto.ensemble import MoleculeEnsemble
+    from kallisto.rmsd import rmsdMatrix
+
+    try:
+        ensemble = MoleculeEnsemble.from_file(inp)
+    except FileNotFoundError:
+        errorbye("Input file not found.")
+    except ValueError as e:
+        errorbye(str(e))
+
+    nconf = ensemble.get_number_of_conformers()
+    errors = rmsdMatrix(ensemble.get_positions(), out=matrix, jobs=jobs)
+
+    silentPrinter(
+        config.silent,
+        "RMSD matrix of {} conformers ({} pairs) written to {}".format(
+            nconf, len(errors), matrix
+        ),
+        out,
+    )
+
+    return errors
+
+
+@cli.command("cluster")
+@pass_config
+@click.option(
+    "--threshold",
+    default=0.125,
+    type=float,
+    show_default=True,
+    help="RMSD threshold in Angstrom.",
+)
+@click.option(
+    "--out",
+    default="-",
+    type=click.File("w"),
+    show_default=True,
+    required=False,
+    help="Write to output file.",
+)
+@click.argument("inp", type=str, required=True)
+def cluster(config, inp: str, threshold: float, out: click.File):
+    """Cluster the conformers of a multi-frame file by RMSD.
+    Prints one row per cluster, starting with its representative."""
+
+    from kallisto.cluster import clusterConformers
+    from kallisto.ensemble import MoleculeEnsemble
+
+    try:
+        ensemble = MoleculeEnsemble.from_file(inp)
+    except FileNotFoundError:
+        errorbye("Input file not found.")
+    except ValueError as e:
+        errorbye(str(e))
+
+    representatives, labels, _ = clusterConformers(ensemble.get_positions(), threshold)
+    for label in range(len(representatives)):
+        printFrame(config, np.flatnonzero(labels == label), out)
+
+    return representatives, labels
+
+
+@cli.command("align")
+@pass_config
+@click.option(
+    "--ref",
+    type=str,
+    required=True,
+    help="Reference structure.",
+)
+@click.option(
+    "--aligned",
+    default="aligned.xyz",
+    type=str,
+    show_default=True,
+    help="Aligned frames (multi-frame xyz file).",
+)
+@click.option(
+    "--chunk",
+    default=1024,
+    type=int,
+    show_default=True,
+    help="Number of frames aligned at once.",
+)
+@click.option(
+    "--out",
+    default="-",
+    type=click.File("w"),
+    show_default=True,
+    required=False,
+    help="Write to output file.",
+)
+@click.argument("inp", type=str, required=True)
+def align(config, inp: str, ref: str, aligned: str, chunk: int, out: click.File):
+    """Superimpose all frames of a trajectory onto a reference structure.
+    Prints the RMSD in Angstrom of every frame."""
+
+    from kallisto.reader import xyz
+    from kallisto.rmsd import alignTrajectory
+
+    reference = ksr.constructMolecule(geometry=ref, out=out)
+    numbers = reference.get_atomic_numbers()
+
+    errors = []
+    try:
+        with open(inp, "r") as fileObject, open(aligned, "w") as alignedObject:
+            frames = ksr.iterArrays(fileObject)
+            for positions, rmsds in alignTrajectory(reference, frames, chunk):
+                xyz.writeFrames(alignedObject, numbers, positions)
+                for error in rmsds:
+                    silentPrinter(config.silent, error, out)
+                errors.append(rmsds)
+    except FileNotFoundError:
+        errorbye("Input file not found.")
+    except ValueError as e:
+        errorbye(str(e))
+
+    return np.concatenate(errors) if errors else np.zeros(shape=(0,))
+
+
 @cli.command("lig")
 @pass_config
 @click.option(
     "--center",
     type=int,
-    default=0,
+    default=[0],
+    multiple=True,
     show_default=True,
     required=True,
-    help="Central atom for which all bonding partner (ligands) are defined.",
+    help="Central atom for which all bonding partner (ligands) are defined "
+    "(may be given several times).",
 )
 @click.option(
     "--out",
@@ -404,8 +732,8 @@ def rms(config, inp: Tuple[str, str], out: click.File):
     help="Write to output file.",
 )
 @click.argument("inp", type=str, default="coord", required=True)
-def lig(config, inp: str, center: int, out: click.File):
-    """Get all substructures (or ligands) that are bound to the center atom."""
+def lig(config, inp: str, center: Tuple[int, ...], out: click.File):
+    """Get all substructures (or ligands) that are bound to the center atoms."""
 
     # setup reference molecular structure
     ref = ksr.constructMolecule(geometry=inp, out=out)
@@ -414,20 +742,21 @@ def lig(config, inp: str, center: int, out: click.File):
     # get all covalent bonding partner in reference complex
     covbonds = ref.get_bonds()
 
-    from kallisto.rmsd import recursiveGetSubstructures
+    from kallisto.rmsd import getLigands
 
-    silentPrinter(config.silent, "Write out substructures for {}".format(center), out)
+    ligands = getLigands(nat, covbonds, center)
 
-    substructures = recursiveGetSubstructures(nat, covbonds, center)  # type: ignore
+    for c, substructures in zip(center, ligands, strict=True):
+        silentPrinter(config.silent, "Write out substructures for {}".format(c), out)
 
-    k = 0
-    for path in substructures:
-        silentPrinter(
-            config.silent,
-            "Substructure {}: {}".format(k, path),
-            out,
-        )
-        k += 1
+        k = 0
+        for path in substructures:
+            silentPrinter(
+                config.silent,
+                "Substructure {}: {}".format(k, path),
+                out,
+            )
+            k += 1
 
 
 @cli.command("exs")
@@ -583,3 +912,74 @@ def stm(config, inp: str, origin: int, partner: int, out: click.File):
     )
 
     return L, bmin, bmax
+
+
+@cli.command("batch")
+@pass_config
+@click.option(
+    "--features",
+    default="cns:cov,eeq,alp",
+    type=str,
+    show_default=True,
+    help="Comma-separated features (cns[:type], prox, bonds, eeq, alp, vdw[:type]).",
+)
+@click.option(
+    "--chrg",
+    default=0,
+    type=int,
+    show_default=True,
+    help="Absolute charge of all systems.",
+)
+@click.option(
+    "--jobs",
+    default=1,
+    type=int,
+    show_default=True,
+    help="Number of worker processes.",
+)
+@click.option(
+    "--out",
+    default="-",
+    type=click.File("w"),
+    show_default=True,
+    required=False,
+    help="Write to output file.",
+)
+@click.argument("inp", type=str, required=True)
+def batch(config, inp: str, features: str, chrg: int, jobs: int, out: click.File):
+    """Atomic features for many structures (directory, glob, or manifest)."""
+
+    from kallisto.batch import getBatchInputs, runBatch
+    from kallisto.features import parseFeature
+
+    featureList = [f.strip() for f in features.split(",") if f.strip()]
+    try:
+        for feature in featureList:
+            parseFeature(feature)
+    except ValueError as e:
+        errorbye(str(e))
+
+    paths = getBatchInputs(inp)
+    if not paths:
+        errorbye("No structure files found for {}.".format(inp))
+
+    header = "\t".join(["file", "atom", "element"] + featureList)
+    silentPrinter(config.silent, header, out)
+
+    failed = 0
+    for path, rows, error in runBatch(paths, featureList, chrg, jobs):
+        if error:
+            failed += 1
+            click.echo("Skip {}: {}".format(path, error), err=True)  # type: ignore
+            continue
+        for row in rows:
+            silentPrinter(config.silent, row, out)
+
+    if failed == len(paths):
+        errorbye("All {} structures failed.".format(failed))
+    if failed:
+        click.echo(  # type: ignore
+            "{} of {} structures failed.".format(failed, len(paths)), err=True
+        )
+
+    return failed
@@ -8283,3 +8283,36 @@ refh[2][83] = 0.01100997834863
 refh[0][84] = 0.00000000000000
 refh[1][84] = 0.07596582020292
 refh[0][85] = 0.00000000000000
+
+# imaginary frequencies of the dynamic polarizabilities
+freq = np.array(
+    [
+        0.000001,
+        0.050000,
+        0.100000,
+        0.200000,
+        0.300000,
+        0.400000,
+        0.500000,
+        0.600000,
+        0.700000,
+        0.800000,
+        0.900000,
+        1.000000,
+        1.200000,
+        1.400000,
+        1.600000,
+        1.800000,
+        2.000000,
+        2.500000,
+        3.000000,
+        4.000000,
+        5.000000,
+        7.500000,
+        10.00000,
+    ],
+    dtype=np.float64,
+)
+
+# trapezoidal integration weights on the frequency grid
+weights = 0.5 * (np.diff(freq, prepend=freq[0]) + np.diff(freq, append=freq[-1]))
@@ -0,0 +1,241 @@
+# src/kallisto/dispersion.py
+from typing import List, Tuple
+
+import numpy as np
+
+from kallisto.neighbors import getNeighborCounts, getNeighborList
+
+
+def getDampingRadii(
+    radii: np.ndarray, i: np.ndarray, j: np.ndarray, a1: float, a2: float
+) -> np.ndarray:
+    """Rational damping radii R0ij = a1·(Ri + Rj) + a2 from sums of van der
+    Waals radii (in Bohr)."""
+
+    return a1 * (radii[i] + radii[j]) + a2
+
+
+def getTwoBodyEnergies(
+    coords: np.ndarray,
+    aw: np.ndarray,
+    radii: np.ndarray,
+    s6: float,
+    a1: float,
+    a2: float,
+    threshold: float,
+    neighbors=None,
+    c6=None,
+) -> np.ndarray:
+    """A method to compute atom-resolved two-body dispersion energies.
+
+            E = -s6·Σ(i<j) C6ij/(Rij^6 + R0ij^6)
+
+    C6 coefficients are integrated from the dynamic polarizabilities aw
+    (nat, 23) for all pairs within the threshold (squared distance in
+    Bohr^2). Each pair energy is split equally onto both atoms. A neighbor
+    list and the matching pair C6 coefficients can be passed in."""
+
+    from kallisto.methods import getSparseC6Coefficients
+
+    nat = len(coords)
+
+    if neighbors is None:
+        neighbors = getNeighborList(coords, threshold)
+    i, j, r = neighbors
+
+    if c6 is None:
+        _, _, c6 = getSparseC6Coefficients(aw, coords, threshold, neighbors=neighbors)
+    r0 = getDampingRadii(radii, i, j, a1, a2)
+    energies = -s6 * c6 / (r**6 + r0**6)
+
+    return getNeighborCounts(nat, i, j, 0.5 * energies)
+
+
+def getPairIndex(
+    nat: int, i: np.ndarray, j: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Search keys, first pair, and number of pairs of every atom in a
+    sorted neighbor list (see getNeighborList)."""
+
+    key = i * nat + j
+    first = np.searchsorted(i, np.arange(nat))
+    count = np.bincount(i, minlength=nat)
+
+    return key, first, count
+
+
+def getTriples(
+    nat: int, i: np.ndarray, j: np.ndarray, start: int = 0, stop=None, index=None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Enumerate all triples i < j < k whose three pairs are in a sorted
+    neighbor list (see getNeighborList).
+
+    Returns the indices of the pairs (ij, ik, jk) into the neighbor list.
+    For each pair (i, j) the pairs (j, k) are expanded as candidates and
+    (i, k) is looked up with a binary search, without Python loops. Only
+    triples whose first pair ij lies in the range start to stop are
+    returned, such that the triples can be enumerated in blocks (the pair
+    index from getPairIndex can be passed in)."""
+
+    npairs = len(i)
+    empty = np.zeros(shape=(0,), dtype=np.int64)
+    if stop is None:
+        stop = npairs
+    if stop <= start:
+        return empty, empty, empty
+
+    # pairs are sorted by their first atom, get the block of each atom
+    if index is None:
+        index = getPairIndex(nat, i, j)
+    key, first, count = index
+
+    # candidates: pairs (j, k) with k > j for every pair (i, j) in the range
+    repeats = count[j[start:stop]]
+    total = int(np.sum(repeats))
+    if total == 0:
+        return empty, empty, empty
+    ij = np.repeat(np.arange(start, stop), repeats)
+    offsets = np.arange(total) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    jk = first[j[ij]] + offsets
+
+    # keep candidates for which the pair (i, k) is in the list as well
+    target = i[ij] * nat + j[jk]
+    ik = np.minimum(np.searchsorted(key, target), npairs - 1)
+    found = key[ik] == target
+
+    return ij[found], ik[found], jk[found]
+
+
+def getTripleBlocks(
+    count: np.ndarray, j: np.ndarray, chunk: int
+) -> List[Tuple[int, int]]:
+    """Split the pairs of a sorted neighbor list into ranges with at most
+    chunk triple candidates each (a single pair may exceed it)."""
+
+    candidates = np.cumsum(count[j])
+
+    blocks = []
+    start = 0
+    while start < len(j):
+        offset = candidates[start - 1] if start > 0 else 0
+        stop = int(np.searchsorted(candidates, offset + chunk, side="right"))
+        stop = max(stop, start + 1)
+        blocks.append((start, stop))
+        start = stop
+
+    return blocks
+
+
+def getThreeBodyEnergies(
+    coords: np.ndarray,
+    aw: np.ndarray,
+    radii: np.ndarray,
+    s9: float,
+    a1: float,
+    a2: float,
+    threshold: float,
+    neighbors=None,
+    c6=None,
+    chunk: int = 262144,
+) -> np.ndarray:
+    """A method to compute atom-resolved Axilrod-Teller-Muto three-body
+    dispersion energies.
+
+            E = Σ(i<j<k) C9ijk·(3·cosθi·cosθj·cosθk + 1)/(Rij·Rik·Rjk)^3·f
+            C9ijk = s9·√(C6ij·C6ik·C6jk)
+            f = 1/(1 + 6·(R̄0/R̄)^16)
+
+    with geometric means R̄ and R̄0 of the distances and damping radii.
+    Triples are enumerated from the neighbor list within the threshold
+    (squared distance in Bohr^2) in blocks of about chunk candidates, such
+    that the memory does not grow with the total number of triples. Each
+    triple energy is split equally onto its three atoms. A neighbor list
+    and the matching pair C6 coefficients can be passed in."""
+
+    from kallisto.methods import getSparseC6Coefficients
+
+    nat = len(coords)
+
+    if neighbors is None:
+        neighbors = getNeighborList(coords, threshold)
+    i, j, r = neighbors
+
+    if c6 is None:
+        _, _, c6 = getSparseC6Coefficients(aw, coords, threshold, neighbors=neighbors)
+    r0 = getDampingRadii(radii, i, j, a1, a2)
+
+    index = getPairIndex(nat, i, j)
+    atomic = np.zeros(shape=(nat,), dtype=np.float64)
+    for start, stop in getTripleBlocks(index[2], j, chunk):
+        ij, ik, jk = getTriples(nat, i, j, start, stop, index=index)
+        rij, rik, rjk = r[ij], r[ik], r[jk]
+        r2ij, r2ik, r2jk = rij**2, rik**2, rjk**2
+
+        # cosines of the three angles of the triangle
+        cosi = (r2ij + r2ik - r2jk) / (2.0 * rij * rik)
+        cosj = (r2ij + r2jk - r2ik) / (2.0 * rij * rjk)
+        cosk = (r2ik + r2jk - r2ij) / (2.0 * rik * rjk)
+        angular = 3.0 * cosi * cosj * cosk + 1.0
+
+        product = rij * rik * rjk
+        ratio = r0[ij] * r0[ik] * r0[jk] / product
+        damp = 1.0 / (1.0 + 6.0 * ratio ** (16.0 / 3.0))
+        c9 = s9 * np.sqrt(c6[ij] * c6[ik] * c6[jk])
+        weights = c9 * angular * damp / product**3 / 3.0
+
+        atomic += np.bincount(i[ij], weights=weights, minlength=nat)
+        atomic += np.bincount(j[ij], weights=weights, minlength=nat)
+        atomic += np.bincount(j[ik], weights=weights, minlength=nat)
+
+    return atomic
+
+
+def getDispersionEnergies(
+    coords: np.ndarray,
+    aw: np.ndarray,
+    radii: np.ndarray,
+    s6: float = 1.0,
+    s9: float = 1.0,
+    a1: float = 0.4,
+    a2: float = 3.4,
+    threshold: float = 3600.0,
+    thresholdATM: float = 1600.0,
+) -> np.ndarray:
+    """A method to compute atom-resolved dispersion energies in Hartree.
+
+    The D4-style energy consists of a rationally damped two-body term and
+    the Axilrod-Teller-Muto three-body term (s9 = 0 switches it off). It is
+    built on dynamic polarizabilities aw (nat, 23) and van der Waals radii
+    (in Bohr). The damping parameters a1 and a2 are generic defaults and
+    not fitted to reference data. The total energy is the sum over atoms.
+    One neighbor list and its C6 coefficients are set up at the larger
+    threshold and masked for the other term."""
+
+    from kallisto.methods import getSparseC6Coefficients
+
+    coords = np.asarray(coords, dtype=np.float64)
+    aw = np.asarray(aw, dtype=np.float64)
+    radii = np.asarray(radii, dtype=np.float64)
+
+    cutoff = max(threshold, thresholdATM) if s9 != 0.0 else threshold
+    neighbors = getNeighborList(coords, cutoff)
+    _, _, c6 = getSparseC6Coefficients(aw, coords, cutoff, neighbors=neighbors)
+
+    def getPairs(limit: float):
+        """Neighbor list and C6 coefficients within a smaller threshold."""
+        if limit >= cutoff:
+            return neighbors, c6
+        mask = neighbors[2] ** 2 <= limit
+        return tuple(values[mask] for values in neighbors), c6[mask]
+
+    pairs, pairC6 = getPairs(threshold)
+    energies = getTwoBodyEnergies(
+        coords, aw, radii, s6, a1, a2, threshold, neighbors=pairs, c6=pairC6
+    )
+    if s9 != 0.0:
+        pairs, pairC6 = getPairs(thresholdATM)
+        energies += getThreeBodyEnergies(
+            coords, aw, radii, s9, a1, a2, thresholdATM, neighbors=pairs, c6=pairC6
+        )
+
+    return energies
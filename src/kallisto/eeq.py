@@ -0,0 +1,186 @@
+# src/kallisto/eeq.py
+import numpy as np
+from scipy import linalg
+
+
+def getConstrainedCharges(y: np.ndarray, e: np.ndarray, charge) -> np.ndarray:
+    """Partial charges from y = A⁻¹X and e = A⁻¹1 for total charges.
+
+            q(Q) = y - λ(Q)·e,  λ(Q) = (1·y - Q)/(1·e)
+
+    y has shape (nat,) or (nrhs, nat) and is broadcast against charge."""
+
+    charge = np.asarray(charge, dtype=np.float64)
+    shape = np.broadcast_shapes(y.shape[:-1], charge.shape)
+    lagrange = (np.sum(y, axis=-1) - charge) / np.sum(e)
+
+    return np.broadcast_to(y, shape + (len(e),)) - (
+        np.asarray(lagrange)[..., np.newaxis] * e
+    )
+
+
+class EEQFactorization(object):
+    """The EEQFactorization object.
+
+    Class for representing the factorized EEQ matrix of one geometry. The
+    positive-definite block A is factorized once by Cholesky and the
+    charge constraint is handled through a Schur complement. Since the
+    partial charges are linear in the total charge Q
+
+            q(Q) = A⁻¹X - λ(Q)·A⁻¹1,  λ(Q) = (1·A⁻¹X - Q)/(1·A⁻¹1)
+
+    charges for any number of total charges or right-hand sides X are
+    obtained from triangular solves only. In case A is not positive
+    definite the full Lagrangian system is LU factorized instead.
+
+    Parameters:
+
+
+    A: array of shape (nat, nat)
+        Symmetric EEQ interaction matrix without constraints."""
+
+    def __init__(self, A: np.ndarray):
+        A = np.asarray(A, dtype=np.float64)
+        self.nat = len(A)
+
+        try:
+            self.cholesky = linalg.cho_factor(A, lower=True)
+            self.lu = None
+            # A⁻¹1 is shared by all right-hand sides
+            self.e = linalg.cho_solve(self.cholesky, np.ones(shape=(self.nat,)))
+        except linalg.LinAlgError:
+            # Lagragian space is +1 in dimensionality
+            m = self.nat + 1
+            B = np.zeros(shape=(m, m), dtype=np.float64)
+            B[: self.nat, : self.nat] = A
+            B[: self.nat, self.nat] = 1.0
+            B[self.nat, : self.nat] = 1.0
+            self.cholesky = None
+            self.lu = linalg.lu_factor(B)
+            self.e = None
+
+    def get_charges(self, X: np.ndarray, charge) -> np.ndarray:
+        """Get partial charges for right-hand sides X and total charges.
+
+        X has shape (nat,) or (nrhs, nat) and charge is a single value or
+        an array. Both are broadcast against each other, e.g., one X and
+        several charges give charges of shape (ncharge, nat)."""
+
+        X = np.asarray(X, dtype=np.float64)
+        charge = np.asarray(charge, dtype=np.float64)
+        shape = np.broadcast_shapes(X.shape[:-1], charge.shape)
+
+        if self.lu is not None:
+            rhs = np.zeros(shape=shape + (self.nat + 1,), dtype=np.float64)
+            rhs[..., : self.nat] = X
+            rhs[..., self.nat] = charge
+            rhs = rhs.reshape(-1, self.nat + 1)
+            qs = linalg.lu_solve(self.lu, rhs.T).T[:, : self.nat]
+            return qs.reshape(shape + (self.nat,))
+
+        # A⁻¹X for all right-hand sides at once
+        y = linalg.cho_solve(self.cholesky, X.reshape(-1, self.nat).T).T
+
+        return getConstrainedCharges(y.reshape(X.shape), self.e, charge)
+
+
+class EEQOperator(object):
+    """The EEQOperator object.
+
+    Class for applying the EEQ matrix A without storing it. The damped
+    Coulomb interactions erf(γij·Rij)/Rij are evaluated on the fly in
+    blocks of rows such that the memory scales linearly with the number of
+    atoms. Each application costs O(N²) time and O(chunk·N) memory.
+
+    Parameters:
+
+
+    at: array of int
+        Atomic nuclear charges.
+    coords: array of shape (nat, 3)
+        Atomic positions in Bohr.
+    chunk: int
+        Number of rows evaluated at once."""
+
+    def __init__(
+        self,
+        at: np.ndarray,
+        coords: np.ndarray,
+        chunk: int = 256,
+    ):
+        from kallisto.methods import getEEQParameters
+
+        # parameter
+        sqrt2pi = np.sqrt(2.0 / np.pi)
+
+        _, gam, _, alpha = getEEQParameters(at)
+        self.coords = np.asarray(coords, dtype=np.float64)
+        self.alpha = alpha
+        self.diagonal = gam + sqrt2pi / np.sqrt(alpha)
+        self.nat = len(self.coords)
+        self.chunk = chunk
+
+    def applyCoulomb(self, V: np.ndarray) -> np.ndarray:
+        """Off-diagonal interactions applied block by block."""
+
+        from scipy import special
+        from scipy.spatial import distance
+
+        AV = np.zeros(shape=V.shape, dtype=np.float64)
+        for start in range(0, self.nat, self.chunk):
+            stop = min(start + self.chunk, self.nat)
+            r = distance.cdist(self.coords[start:stop], self.coords)
+            # the diagonal is treated separately, erf(∞)/∞ vanishes
+            r[np.arange(stop - start), np.arange(start, stop)] = np.inf
+            gamij = 1.0 / np.sqrt(
+                self.alpha[start:stop, np.newaxis] + self.alpha[np.newaxis, :]
+            )
+            AV[start:stop] = (special.erf(gamij * r) / r) @ V
+
+        return AV
+
+    def matvec(self, V: np.ndarray) -> np.ndarray:
+        """Apply A to vectors V of shape (nat, k)."""
+
+        diagonal = self.diagonal[:, np.newaxis] * V
+
+        return diagonal + self.applyCoulomb(V)
+
+
+def solveConjugateGradient(
+    operator: EEQOperator, B: np.ndarray, tol: float = 1e-8, maxiter: int = 1000
+) -> np.ndarray:
+    """Jacobi-preconditioned conjugate gradients for A·Y = B.
+
+    All right-hand sides B of shape (nat, k) are iterated together, each
+    until its residual norm dropped below tol relative to its norm."""
+
+    diagonal = operator.diagonal[:, np.newaxis]
+    norm = np.linalg.norm(B, axis=0)
+
+    Y = B / diagonal
+    R = B - operator.matvec(Y)
+    Z = R / diagonal
+    P = Z.copy()
+    rz = np.sum(R * Z, axis=0)
+
+    for _ in range(maxiter):
+        active = np.linalg.norm(R, axis=0) > tol * norm
+        if not np.any(active):
+            return Y
+
+        AP = operator.matvec(P)
+        pap = np.sum(P * AP, axis=0)
+        step = np.where(active, rz / np.where(active, pap, 1.0), 0.0)
+        Y += step * P
+        R -= step * AP
+
+        Z = R / diagonal
+        rzNew = np.sum(R * Z, axis=0)
+        beta = np.where(active, rzNew / np.where(active, rz, 1.0), 0.0)
+        P = Z + beta * P
+        rz = rzNew
+
+    raise RuntimeError(
+        "EEQ conjugate gradient not converged in {} iterations.".format(maxiter)
+    )
@@ -0,0 +1,356 @@
+# src/kallisto/ensemble.py
+import copy
+from typing import List, Tuple
+
+import numpy as np
+
+from kallisto.molecule import Molecule
+
+
+class MoleculeEnsemble(object):
+    """The MoleculeEnsemble object.
+
+    Class for representing an ensemble of conformers that share the same
+    atomic numbers. Features are evaluated across the conformer axis in one
+    vectorized call and returned as (nconf, nat) arrays.
+
+    Parameters:
+
+
+    numbers: list of int
+        Atomic nuclear charges (shared by all conformers).
+    positions: array of shape (nconf, nat, 3)
+        Atomic positions of all conformers."""
+
+    def __init__(self, numbers, positions):
+        numbers = np.array(numbers, dtype=int, order="C")
+        positions = np.array(positions, dtype=float, order="C")
+
+        if positions.ndim == 2:
+            positions = positions[np.newaxis, :, :]
+
+        if positions.ndim != 3 or positions.shape[1:] != (len(numbers), 3):
+            raise ValueError(
+                "Positions have wrong shape {a} != (nconf, {b}, 3).".format(
+                    a=positions.shape, b=len(numbers)
+                )
+            )
+
+        self.arrays = {"numbers": numbers, "positions": positions}
+        self.cache = {}
+
+    @classmethod
+    def from_molecules(cls, molecules: List[Molecule]):
+        """Create an ensemble from conformers with identical atomic numbers."""
+
+        numbers = molecules[0].get_atomic_numbers()
+        for molecule in molecules[1:]:
+            if not np.array_equal(molecule.get_atomic_numbers(), numbers):
+                raise ValueError("Conformers differ in their atomic numbers.")
+
+        positions = np.stack([molecule.get_positions() for molecule in molecules])
+        return cls(numbers, positions)
+
+    @classmethod
+    def from_file(cls, geometry: str):
+        """Create an ensemble from all frames of a (multi-frame) input file."""
+
+        from kallisto.reader.strucreader import iterArrays
+
+        numbers, positions = None, []
+        with open(geometry, "r") as fileObject:
+            for at, xyz in iterArrays(fileObject):
+                if numbers is None:
+                    numbers = at
+                elif not np.array_equal(at, numbers):
+                    raise ValueError("Conformers differ in their atomic numbers.")
+                positions.append(xyz)
+
+        if numbers is None:
+            raise ValueError("No structures found in {}.".format(geometry))
+
+        return cls(numbers, np.stack(positions))
+
+    # Getter methods
+    def get_atomic_numbers(self):
+        """Get integer array of atomic numbers."""
+        return self.arrays["numbers"].copy()
+
+    def get_positions(self):
+        """Get positions-array of shape (nconf, nat, 3)."""
+        return self.arrays["positions"]
+
+    def get_number_of_atoms(self):
+        """Get integer number of atoms."""
+        return len(self.arrays["numbers"])
+
+    def get_number_of_conformers(self):
+        """Get integer number of conformers."""
+        return len(self.arrays["positions"])
+
+    def get_molecule(self, index: int) -> Molecule:
+        """Get a single conformer as Molecule."""
+        return Molecule(
+            numbers=self.arrays["numbers"], positions=self.arrays["positions"][index]
+        )
+
+    def get_cached(self, key: tuple, compute):
+        """Get a derived feature from the cache or compute and store it."""
+
+        if key not in self.cache:
+            self.cache[key] = compute()
+        return copy.deepcopy(self.cache[key])
+
+    def get_cns(self, cntype: str, threshold=800.0):
+        """Get coordination numbers (cns) of all conformers."""
+
+        from kallisto.methods import getCoordinationNumbersBatch
+
+        at = self.arrays["numbers"]
+        coords = self.arrays["positions"]
+        return self.get_cached(
+            ("cns", cntype, threshold),
+            lambda: getCoordinationNumbersBatch(at, coords, cntype, threshold),
+        )
+
+    def get_prox(self, size: Tuple[int, int], threshold=800.0):
+        """Get atomic proximity shells (prox) of all conformers."""
+
+        from kallisto.methods import getProximityShellsBatch
+
+        at = self.arrays["numbers"]
+        coords = self.arrays["positions"]
+        return self.get_cached(
+            ("prox", tuple(size), threshold),
+            lambda: getProximityShellsBatch(at, coords, size, threshold),
+        )
+
+    def get_eeq(self, charge: int):
+        """Get atomic electronegativity equilibration partial charges (eeqs)
+        of all conformers."""
+
+        from kallisto.methods import getAtomicPartialChargesBatch
+
+        at = self.arrays["numbers"]
+        coords = self.arrays["positions"]
+        return self.get_cached(
+            ("eeq", charge),
+            lambda: getAtomicPartialChargesBatch(
+                at, coords, self.get_cns(cntype="cov"), charge
+            ),
+        )
+
+    def get_alp(self, charge: int, dynamic: bool = False):
+        """Get atomic-charge dependent static atomic polarizabilities (alps)
+        of all conformers. With dynamic=True the polarizabilities at all 23
+        imaginary frequencies are returned as (nconf, nat, 23) array."""
+
+        from kallisto.methods import getDynamicPolarizabilitiesBatch
+
+        at = self.arrays["numbers"]
+        if dynamic:
+            return self.get_cached(
+                ("alpiw", charge),
+                lambda: getDynamicPolarizabilitiesBatch(
+                    at, self.get_cns(cntype="cov"), self.get_eeq(charge), charge
+                ),
+            )
+
+        return self.get_cached(
+            ("alp", charge),
+            lambda: np.ascontiguousarray(self.get_alp(charge, dynamic=True)[..., 0]),
+        )
+
+    def get_vdw(self, charge: int, vdwtype: str, scale: float):
+        """Get atomic-charge dependent van der Waals radii (vdws) of all
+        conformers."""
+
+        from kallisto.methods import getVanDerWaalsRadiiBatch
+
+        at = self.arrays["numbers"]
+        return self.get_cached(
+            ("vdw", charge, vdwtype, scale),
+            lambda: getVanDerWaalsRadiiBatch(at, self.get_alp(charge), vdwtype, scale),
+        )
+
+
+class MoleculeBatch(object):
+    """The MoleculeBatch object.
+
+    Class for representing many molecules of different sizes. Molecules are
+    bucketed by their number of atoms and each bucket is stored as padded
+    arrays with an atom mask, such that thousands of small systems are
+    evaluated as a few large array operations. Features are returned as a
+    list of arrays in input order.
+
+    Parameters:
+
+
+    numbers: list of arrays of int
+        Atomic nuclear charges of each molecule.
+    positions: list of arrays of shape (nat, 3)
+        Atomic positions of each molecule.
+    width: int
+        Bucket width, molecules are padded to the next multiple of width."""
+
+    def __init__(self, numbers, positions, width: int = 16):
+        if len(numbers) != len(positions):
+            raise ValueError(
+                "Got {a} sets of atomic numbers but {b} sets of positions.".format(
+                    a=len(numbers), b=len(positions)
+                )
+            )
+
+        self.nats = np.array([len(at) for at in numbers], dtype=int)
+        self.buckets = []
+
+        padded = width * np.maximum(-(-self.nats // width), 1)
+        for size in np.unique(padded):
+            indices = np.flatnonzero(padded == size)
+            at = np.zeros(shape=(len(indices), size), dtype=int)
+            xyz = np.zeros(shape=(len(indices), size, 3), dtype=np.float64)
+            mask = np.zeros(shape=(len(indices), size), dtype=bool)
+            for k, index in enumerate(indices):
+                nat = self.nats[index]
+                at[k, :nat] = numbers[index]
+                xyz[k, :nat] = positions[index]
+                mask[k, :nat] = True
+            self.buckets.append(
+                {"indices": indices, "numbers": at, "positions": xyz, "mask": mask}
+            )
+
+        self.cache = {}
+
+    @classmethod
+    def from_molecules(cls, molecules: List[Molecule], width: int = 16):
+        """Create a batch from a list of molecules."""
+
+        return cls(
+            [molecule.get_atomic_numbers() for molecule in molecules],
+            [molecule.get_positions() for molecule in molecules],
+            width=width,
+        )
+
+    def get_number_of_molecules(self):
+        """Get integer number of molecules."""
+        return len(self.nats)
+
+    def get_padded(self, key: tuple, kernel) -> List[np.ndarray]:
+        """Get padded values of a feature for all buckets.
+
+        kernel(k, bucket) evaluates bucket k and is called once per key."""
+
+        if key not in self.cache:
+            self.cache[key] = [
+                kernel(k, bucket) for k, bucket in enumerate(self.buckets)
+            ]
+        return self.cache[key]
+
+    def unpad(self, padded: List[np.ndarray]) -> List[np.ndarray]:
+        """Split padded bucket values into per-molecule arrays in input order."""
+
+        results: List[np.ndarray] = [np.zeros(shape=(0,))] * len(self.nats)
+        for bucket, values in zip(self.buckets, padded, strict=True):
+            for row, index in enumerate(bucket["indices"]):
+                results[index] = values[row, : self.nats[index]].copy()
+        return results
+
+    def get_charges(self, charge, bucket: dict) -> np.ndarray:
+        """Total charges of the molecules in a bucket."""
+
+        charges = np.broadcast_to(np.asarray(charge), self.nats.shape)
+        return charges[bucket["indices"]]
+
+    def get_padded_cns(self, cntype: str, threshold=800.0):
+        """Padded coordination numbers (cns) of all buckets."""
+
+        from kallisto.methods import getCoordinationNumbersBatch
+
+        return self.get_padded(
+            ("cns", cntype, threshold),
+            lambda k, b: getCoordinationNumbersBatch(
+                b["numbers"], b["positions"], cntype, threshold, mask=b["mask"]
+            ),
+        )
+
+    def get_padded_eeq(self, charge):
+        """Padded EEQ partial charges of all buckets."""
+
+        from kallisto.methods import getAtomicPartialChargesBatch
+
+        cns = self.get_padded_cns("cov")
+        return self.get_padded(
+            ("eeq", tuple(np.ravel(charge).tolist())),
+            lambda k, b: getAtomicPartialChargesBatch(
+                b["numbers"],
+                b["positions"],
+                cns[k],
+                self.get_charges(charge, b),
+                mask=b["mask"],
+            ),
+        )
+
+    def get_padded_alp(self, charge, dynamic: bool = False):
+        """Padded static (or dynamic) atomic polarizabilities of all buckets."""
+
+        from kallisto.methods import getDynamicPolarizabilitiesBatch
+
+        cns = self.get_padded_cns("cov")
+        qs = self.get_padded_eeq(charge)
+        alpiw = self.get_padded(
+            ("alpiw", tuple(np.ravel(charge).tolist())),
+            lambda k, b: getDynamicPolarizabilitiesBatch(
+                b["numbers"], cns[k], qs[k], charge, mask=b["mask"]
+            ),
+        )
+        if dynamic:
+            return alpiw
+
+        return self.get_padded(
+            ("alp", tuple(np.ravel(charge).tolist())),
+            lambda k, b: np.ascontiguousarray(alpiw[k][..., 0]),
+        )
+
+    def get_cns(self, cntype: str, threshold=800.0):
+        """Get coordination numbers (cns) of all molecules."""
+
+        return self.unpad(self.get_padded_cns(cntype, threshold))
+
+    def get_prox(self, size: Tuple[int, int], threshold=800.0):
+        """Get atomic proximity shells (prox) of all molecules."""
+
+        from kallisto.methods import getProximityShellsBatch
+
+        padded = self.get_padded(
+            ("prox", tuple(size), threshold),
+            lambda k, b: getProximityShellsBatch(
+                b["numbers"], b["positions"], size, threshold, mask=b["mask"]
+            ),
+        )
+        return self.unpad(padded)
+
+    def get_eeq(self, charge):
+        """Get atomic electronegativity equilibration partial charges (eeqs)
+        of all molecules. The total charge is one value or one per molecule."""
+
+        return self.unpad(self.get_padded_eeq(charge))
+
+    def get_alp(self, charge, dynamic: bool = False):
+        """Get atomic-charge dependent static atomic polarizabilities (alps)
+        of all molecules. With dynamic=True each molecule gets a (nat, 23)
+        array of polarizabilities at all imaginary frequencies."""
+
+        return self.unpad(self.get_padded_alp(charge, dynamic=dynamic))
+
+    def get_vdw(self, charge, vdwtype: str, scale: float):
+        """Get atomic-charge dependent van der Waals radii (vdws) of all
+        molecules."""
+
+        from kallisto.methods import getVanDerWaalsRadiiBatch
+
+        alp = self.get_padded_alp(charge)
+        padded = self.get_padded(
+            ("vdw", tuple(np.ravel(charge).tolist()), vdwtype, scale),
+            lambda k, b: getVanDerWaalsRadiiBatch(b["numbers"], alp[k], vdwtype, scale),
+        )
+        return self.unpad(padded)
@@ -0,0 +1,206 @@
+# src/kallisto/features.py
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from kallisto.molecule import Molecule
+
+# Available features with their default argument
+defaultArguments = {
+    "cns": "erf",
+    "prox": None,
+    "bonds": None,
+    "eeq": None,
+    "alp": None,
+    "vdw": "rahm",
+    "c6": None,
+    "disp": None,
+}
+
+# Allowed arguments of features
+availableArguments = {
+    "cns": ("erf", "cov", "exp"),
+    "vdw": ("rahm", "truhlar"),
+}
+
+
+def parseFeature(spec: str) -> Tuple[str, ...]:
+    """Split a feature specification like "cns:cov" into a graph node."""
+
+    name, _, argument = spec.partition(":")
+    name = name.strip()
+    argument = argument.strip()
+
+    if name not in defaultArguments:
+        raise ValueError('Feature "{}" is not implemented.'.format(name))
+
+    default = defaultArguments[name]
+    if default is None:
+        if argument:
+            raise ValueError('Feature "{}" takes no argument.'.format(name))
+        return (name,)
+
+    argument = argument or default
+    if argument not in availableArguments[name]:
+        raise ValueError(
+            'Feature "{}" does not support "{}". Please use {}.'.format(
+                name, argument, ", ".join(availableArguments[name])
+            )
+        )
+
+    return (name, argument)
+
+
+def getDependencies(node: Tuple[str, ...]) -> List[Tuple[str, ...]]:
+    """Intermediates that have to be available before node is computed."""
+
+    name = node[0]
+    if name in ("cns", "prox", "bonds"):
+        return [("pairs",)]
+    if name == "eeq":
+        return [("cns", "cov")]
+    if name == "alpiw":
+        return [("cns", "cov"), ("eeq",)]
+    if name in ("alp", "c6"):
+        return [("alpiw",)]
+    if name == "vdw":
+        return [("alp",)]
+    if name == "disp":
+        return [("alpiw",), ("alp",)]
+    return []
+
+
+def getFeaturePlan(features: List[str]) -> List[Tuple[str, ...]]:
+    """Resolve the dependency graph of the requested features.
+
+    Returns all graph nodes in an order in which every intermediate is
+    computed once and before any node that depends on it."""
+
+    plan: List[Tuple[str, ...]] = []
+
+    def visit(node):
+        if node in plan:
+            return
+        for dependency in getDependencies(node):
+            visit(dependency)
+        plan.append(node)
+
+    for spec in features:
+        visit(parseFeature(spec))
+
+    return plan
+
+
+def getCacheKey(
+    node: Tuple[str, ...], charge: int, size: Tuple[int, int], scale: float
+) -> tuple:
+    """Key of a graph node in the feature cache of Molecule."""
+
+    name = node[0]
+    if name == "pairs":
+        return ("pairs", 800.0)
+    if name == "cns":
+        return ("cns", node[1], 800.0)
+    if name == "prox":
+        return ("prox", tuple(size), 800.0)
+    if name == "bonds":
+        return ("bonds", "X", 0.6, 800.0)
+    if name == "vdw":
+        return ("vdw", charge, node[1], scale)
+    if name == "c6":
+        return ("c6aa", charge)
+    return (name, charge)
+
+
+def computeNode(
+    node: Tuple[str, ...],
+    molecule: Molecule,
+    values: dict,
+    charge: int,
+    size: Tuple[int, int],
+    scale: float,
+):
+    """Compute a single graph node from its already available dependencies."""
+
+    from kallisto.dispersion import getDispersionEnergies
+    from kallisto.methods import (
+        getAtomicPartialCharges,
+        getC6Coefficients,
+        getCoordinationNumbers,
+        getCovalentBondingPartner,
+        getDynamicPolarizabilities,
+        getProximityShells,
+        getVanDerWaalsRadii,
+    )
+    from kallisto.neighbors import getNeighborList
+
+    at = molecule.get_atomic_numbers()
+    coords = molecule.get_positions()
+    nat = molecule.get_number_of_atoms()
+
+    name = node[0]
+    if name == "pairs":
+        return getNeighborList(coords, 800.0)
+    if name == "cns":
+        return getCoordinationNumbers(
+            at, coords, node[1], 800.0, neighbors=values[("pairs",)]
+        )
+    if name == "prox":
+        return getProximityShells(at, coords, size, 800.0, neighbors=values[("pairs",)])
+    if name == "bonds":
+        return getCovalentBondingPartner(
+            at, coords, "X", 0.6, 800.0, neighbors=values[("pairs",)]
+        )
+    if name == "eeq":
+        return getAtomicPartialCharges(
+            at,
+            coords,
+            values[("cns", "cov")],
+            charge,
+            factorization=molecule.get_eeq_factorization(),
+        )
+    if name == "alpiw":
+        return getDynamicPolarizabilities(
+            at, values[("cns", "cov")], values[("eeq",)], charge
+        )
+    if name == "alp":
+        return np.ascontiguousarray(values[("alpiw",)][:, 0])
+    if name == "c6":
+        # homoatomic C6 of each atom, evaluated as a stack of 1x1 systems
+        return getC6Coefficients(values[("alpiw",)][:, np.newaxis, :])[:, 0, 0]
+    if name == "vdw":
+        return getVanDerWaalsRadii(nat, at, values[("alp",)], node[1], scale)
+    if name == "disp":
+        radii = getVanDerWaalsRadii(nat, at, values[("alp",)], "rahm", 1.0)
+        return getDispersionEnergies(coords, values[("alpiw",)], radii)
+
+    raise ValueError('Feature "{}" is not implemented.'.format(name))
+
+
+def compute(
+    molecule: Molecule,
+    features: List[str],
+    charge: int = 0,
+    size: Tuple[int, int] = (2, 3),
+    scale: float = 1.0,
+) -> Dict[str, np.ndarray]:
+    """Compute several atomic features of a molecule in one pass.
+
+    Features are given as "name" or "name:argument", e.g.,
+    ["cns:cov", "eeq", "alp", "vdw:rahm", "prox", "c6", "disp"]. The dependency
+    graph is resolved first such that shared intermediates (neighbor list,
+    covalent CNs, EEQ charges, dynamic polarizabilities) are computed once. All nodes are
+    stored in the feature cache of the molecule. Returns a dictionary that
+    maps each requested feature to its values."""
+
+    from functools import partial
+
+    values: Dict[Tuple[str, ...], object] = {}
+
+    for node in getFeaturePlan(features):
+        values[node] = molecule.get_cached(
+            getCacheKey(node, charge, size, scale),
+            partial(computeNode, node, molecule, values, charge, size, scale),
+        )
+
+    return {spec: values[parseFeature(spec)] for spec in features}  # type: ignore
@@ -0,0 +1,200 @@
+# src/kallisto/incremental.py
+import numpy as np
+
+from kallisto.molecule import Molecule
+
+
+class IncrementalEvaluator(object):
+    """The IncrementalEvaluator object.
+
+    Class for evaluating covalent coordination numbers and EEQ partial
+    charges of a structure in which only a few atoms move between
+    evaluations (ligand placement, torsion scans). The pair contributions
+    to the CNs, the EEQ matrix A and its inverse are kept. Moving k atoms
+    changes only their rows and columns of A, which is written as the
+    symmetric rank-2k update
+
+            ΔA = C·Eᵀ + E·Cᵀ = U·W·Uᵀ,  U = [C, E],  W = [[0, I], [I, 0]],
+
+    with the unit columns E of the moved atoms. The inverse is updated by
+    the Woodbury identity in O(k·N²) instead of refactorizing in O(N³).
+    If more than maxFraction of the atoms move, or after refresh low-rank
+    updates (to avoid accumulating round-off), everything is rebuilt.
+
+    Parameters:
+
+
+    numbers: list of int
+        Atomic nuclear charges.
+    positions: array of shape (nat, 3)
+        Atomic positions in Bohr.
+    charge: int
+        Total charge of the system.
+    threshold: float
+        Squared cutoff distance of the CN pairs in Bohr^2.
+    maxFraction: float
+        Largest fraction of moved atoms that is updated incrementally.
+    refresh: int
+        Number of low-rank updates after which everything is rebuilt."""
+
+    def __init__(
+        self,
+        numbers,
+        positions,
+        charge: int = 0,
+        threshold: float = 800.0,
+        maxFraction: float = 0.25,
+        refresh: int = 100,
+    ):
+        self.numbers = np.array(numbers, dtype=int)
+        self.positions = np.array(positions, dtype=np.float64)
+        self.charge = charge
+        self.threshold = threshold
+        self.maxFraction = maxFraction
+        self.refresh = refresh
+
+        self.rebuild()
+
+    @classmethod
+    def from_molecule(cls, molecule: Molecule, charge: int = 0, **kwargs):
+        """Create an incremental evaluator for a molecule."""
+
+        return cls(
+            molecule.get_atomic_numbers(), molecule.get_positions(), charge, **kwargs
+        )
+
+    def get_pair_contributions(self, indices: np.ndarray) -> np.ndarray:
+        """Covalent CN contributions of all atoms (rows) with the atoms in
+        indices (columns) at the current positions."""
+
+        from kallisto.methods import getCoordinationNumberDamping
+
+        diff = self.positions[:, np.newaxis, :] - self.positions[indices]
+        rSquared = np.einsum("ijk,ijk->ij", diff, diff)
+        pair = (rSquared <= self.threshold) & (rSquared > 0.0)
+        r = np.sqrt(np.where(pair, rSquared, 1.0))
+        damp = getCoordinationNumberDamping(
+            self.numbers[:, np.newaxis], self.numbers[indices], r, "cov"
+        )
+
+        return np.where(pair, damp, 0.0)
+
+    def get_matrix_columns(self, indices: np.ndarray) -> np.ndarray:
+        """Columns of the EEQ matrix A for the atoms in indices."""
+
+        from scipy import special
+        from scipy.spatial import distance
+
+        from kallisto.methods import getEEQParameters
+
+        _, _, _, alpha = getEEQParameters(self.numbers)
+        r = distance.cdist(self.positions, self.positions[indices])
+        # the diagonal does not depend on the positions, erf(∞)/∞ vanishes
+        r[indices, np.arange(len(indices))] = np.inf
+        gamij = 1.0 / np.sqrt(alpha[:, np.newaxis] + alpha[indices])
+        columns = special.erf(gamij * r) / r
+        columns[indices, np.arange(len(indices))] = self.A[indices, indices]
+
+        return columns
+
+    def rebuild(self):
+        """Rebuild CN pair contributions, EEQ matrix, and its inverse."""
+
+        from scipy import linalg
+
+        from kallisto.methods import getEEQMatrix
+
+        nat = len(self.numbers)
+        self.pairs = self.get_pair_contributions(np.arange(nat))
+        self.cns = np.sum(self.pairs, axis=1)
+
+        self.A = getEEQMatrix(self.numbers, self.positions)
+        identity = np.eye(nat, dtype=np.float64)
+        try:
+            self.inverse = linalg.cho_solve(linalg.cho_factor(self.A), identity)
+        except linalg.LinAlgError:
+            self.inverse = np.linalg.solve(self.A, identity)
+
+        self.updates = 0
+
+    def set_positions(self, positions: np.ndarray):
+        """Move atoms to new positions.
+
+        Only atoms whose positions changed are updated."""
+
+        positions = np.asarray(positions, dtype=np.float64)
+        moved = np.flatnonzero(np.any(positions != self.positions, axis=1))
+        self.move(moved, positions[moved])
+
+    def move(self, indices, positions: np.ndarray):
+        """Move the atoms in indices to new positions."""
+
+        indices = np.asarray(indices, dtype=int)
+        if len(indices) == 0:
+            return
+
+        self.positions[indices] = positions
+        nat = len(self.numbers)
+        k = len(indices)
+
+        if k > self.maxFraction * nat or self.updates >= self.refresh:
+            self.rebuild()
+            return
+
+        # CN contributions of all pairs that involve a moved atom
+        old = self.pairs[:, indices].copy()
+        new = self.get_pair_contributions(indices)
+        self.pairs[:, indices] = new
+        self.pairs[indices, :] = new.T
+        self.cns += np.sum(new - old, axis=1)
+        self.cns[indices] = np.sum(self.pairs[indices], axis=1)
+
+        # symmetric rank-2k update of A, moved-moved entries are shared
+        columns = self.get_matrix_columns(indices)
+        C = columns - self.A[:, indices]
+        C[indices] *= 0.5
+        self.A[:, indices] = columns
+        self.A[indices, :] = columns.T
+
+        E = np.zeros(shape=(nat, k), dtype=np.float64)
+        E[indices, np.arange(k)] = 1.0
+        U = np.concatenate((C, E), axis=1)
+        W = np.zeros(shape=(2 * k, 2 * k), dtype=np.float64)
+        W[:k, k:] = np.eye(k)
+        W[k:, :k] = np.eye(k)
+
+        # Woodbury: (A + UWUᵀ)⁻¹ = A⁻¹ - A⁻¹U·(W⁻¹ + UᵀA⁻¹U)⁻¹·UᵀA⁻¹, W⁻¹ = W
+        AinvU = self.inverse @ U
+        try:
+            capacitance = np.linalg.solve(W + U.T @ AinvU, AinvU.T)
+        except np.linalg.LinAlgError:
+            self.rebuild()
+            return
+        self.inverse -= AinvU @ capacitance
+        self.updates += 1
+
+    def get_cns(self) -> np.ndarray:
+        """Get covalent coordination numbers at the current positions."""
+
+        return self.cns.copy()
+
+    def get_eeq(self, charge=None) -> np.ndarray:
+        """Get EEQ partial charges at the current positions."""
+
+        from kallisto.eeq import getConstrainedCharges
+        from kallisto.methods import getEEQVector
+
+        if charge is None:
+            charge = self.charge
+
+        # incremental sums may end up marginally below zero
+        X = getEEQVector(self.numbers, np.maximum(self.cns, 0.0))
+        y = self.inverse @ X
+        e = np.sum(self.inverse, axis=1)
+
+        return getConstrainedCharges(y, e, charge)
+
+    def get_molecule(self) -> Molecule:
+        """Get the current structure as Molecule."""
+
+        return Molecule(numbers=self.numbers, positions=self.positions)
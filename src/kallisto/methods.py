@@ -1,17 +1,30 @@
 # src/kallisto/methods.py
+from functools import lru_cache
 from typing import Tuple
 
 import numpy as np
 
 
 def getCoordinationNumbers(
-    at: np.ndarray, coords: np.ndarray, cntype: str, threshold: float
+    at: np.ndarray,
+    coords: np.ndarray,
+    cntype: str,
+    threshold: float,
+    vectorized: bool = True,
+    neighbors=None,
 ):
     """A method to compute coordination numbers (cns).
 
     CN values are calculated for a given structure and are returned as an
     array. Choose functional type by "cn" defining standard (exp), covalent (cov),
-    or error (err)."""
+    or error (err). By default all atom pairs are evaluated at once with
+    NumPy array operations over a neighbor list, vectorized=False selects
+    the reference loops."""
+
+    if vectorized:
+        return getVectorizedCoordinationNumbers(
+            at, coords, cntype, threshold, neighbors=neighbors
+        )
 
     from kallisto.data import covalent_radius as rcov
     from kallisto.data import pauling_en
@@ -25,7 +38,7 @@ def getCoordinationNumbers(
         for i in range(nat):
             ia = at[i] - 1
             for j in range(nat):
-                if i is j:
+                if i == j:
                     continue
                 dx = coords[j][0] - coords[i][0]
                 dy = coords[j][1] - coords[i][1]
@@ -46,7 +59,7 @@ def getCoordinationNumbers(
         for i in range(nat):
             ia = at[i] - 1
             for j in range(nat):
-                if i is j:
+                if i == j:
                     continue
                 ja = at[j] - 1
                 dx = coords[j][0] - coords[i][0]
@@ -70,7 +83,7 @@ def getCoordinationNumbers(
         for i in range(nat):
             ia = at[i] - 1
             for j in range(nat):
-                if i is j:
+                if i == j:
                     continue
                 ja = at[j] - 1
                 dx = coords[j][0] - coords[i][0]
@@ -90,18 +103,170 @@ def getCoordinationNumbers(
     return cns
 
 
+def getVectorizedCoordinationNumbers(
+    at: np.ndarray,
+    coords: np.ndarray,
+    cntype: str,
+    threshold: float,
+    neighbors=None,
+):
+    """A method to compute coordination numbers (cns) from arrays.
+
+    Atom pairs within the threshold (squared distance in Bohr^2) are taken
+    from a neighbor list, which can be passed in to share it between kernels,
+    and the counting function contributions are reduced per atom."""
+
+    from kallisto.neighbors import getNeighborCounts, getNeighborList
+
+    at = np.asarray(at)
+    nat = len(at)
+
+    if neighbors is None:
+        neighbors = getNeighborList(coords, threshold)
+    i, j, r = neighbors
+
+    damp = getCoordinationNumberDamping(at[i], at[j], r, cntype)
+
+    return getNeighborCounts(nat, i, j, damp)
+
+
+def getCoordinationNumberDamping(
+    ati: np.ndarray, atj: np.ndarray, r: np.ndarray, cntype: str
+):
+    """Counting function for atom pairs with atomic numbers ati and atj.
+
+    Returns the contribution of each pair at distance r to the coordination
+    number for standard (exp), covalent (cov), or error (erf) type."""
+
+    from kallisto.data import covalent_radius as rcov
+    from kallisto.data import pauling_en
+    from scipy import special
+
+    rcov = np.asarray(rcov)
+    ia = np.asarray(ati) - 1
+    ja = np.asarray(atj) - 1
+    rco = rcov[ia] + rcov[ja]
+
+    if cntype == "exp":
+        k1 = 16.0
+        rr = rco / r
+        return 1.0 / (1.0 + np.exp(-k1 * (rr - 1.0)))
+
+    if cntype == "erf":
+        kn = 7.50
+        return 0.5 * (1.0 + special.erf(-kn * (r - rco) / rco))
+
+    if cntype == "cov":
+        # Fitted to match Wiberg bond orders of diatomic molecules
+        k4 = 4.10451
+        k5 = 19.08857
+        k6 = 2 * 11.28174**2
+
+        kn = 7.50
+        en = np.asarray(pauling_en)
+        den = k4 * np.exp(-((np.abs(en[ia] - en[ja]) + k5) ** 2) / k6)
+        return den * 0.5 * (1 + special.erf(-kn * (r - rco) / rco))
+
+    return np.zeros_like(r)
+
+
+def getCoordinationNumberDampingDerivative(
+    ati: np.ndarray, atj: np.ndarray, r: np.ndarray, cntype: str
+):
+    """Derivative of the counting function with respect to the distance r
+    for standard (exp), covalent (cov), or error (erf) type."""
+
+    from kallisto.data import covalent_radius as rcov
+    from kallisto.data import pauling_en
+
+    rcov = np.asarray(rcov)
+    ia = np.asarray(ati) - 1
+    ja = np.asarray(atj) - 1
+    rco = rcov[ia] + rcov[ja]
+
+    if cntype == "exp":
+        k1 = 16.0
+        expterm = np.exp(-k1 * (rco / r - 1.0))
+        return -k1 * rco * expterm / (r * (1.0 + expterm)) ** 2
+
+    # derivative of 0.5·(1 + erf(-kn·(r-rco)/rco))
+    kn = 7.50
+    derf = -kn / (rco * np.sqrt(np.pi)) * np.exp(-((kn * (r - rco) / rco) ** 2))
+
+    if cntype == "erf":
+        return derf
+
+    if cntype == "cov":
+        # Fitted to match Wiberg bond orders of diatomic molecules
+        k4 = 4.10451
+        k5 = 19.08857
+        k6 = 2 * 11.28174**2
+
+        en = np.asarray(pauling_en)
+        den = k4 * np.exp(-((np.abs(en[ia] - en[ja]) + k5) ** 2) / k6)
+        return den * derf
+
+    return np.zeros_like(r)
+
+
+def getCoordinationNumberGradient(
+    at: np.ndarray,
+    coords: np.ndarray,
+    cntype: str,
+    threshold: float,
+    neighbors=None,
+):
+    """A method to compute analytical derivatives of coordination numbers.
+
+    The derivatives are returned pair-wise as (i, j, dcn), where dcn of
+    shape (npairs, 3) is the derivative of the pair contribution with
+    respect to the position of atom j. Each pair contributes to both CNs,
+    such that dCNi/dRj = dCNj/dRj = dcn and dCNi/dRi = dCNj/dRi = -dcn."""
+
+    from kallisto.neighbors import getNeighborList
+
+    at = np.asarray(at)
+    coords = np.asarray(coords, dtype=np.float64)
+
+    if neighbors is None:
+        neighbors = getNeighborList(coords, threshold)
+    i, j, r = neighbors
+
+    ddamp = getCoordinationNumberDampingDerivative(at[i], at[j], r, cntype)
+    dcn = (ddamp / r)[:, np.newaxis] * (coords[j] - coords[i])
+
+    return i, j, dcn
+
+
+def getDenseGradient(nat: int, i: np.ndarray, j: np.ndarray, dvec: np.ndarray):
+    """Expand pair-wise derivatives (see getCoordinationNumberGradient) into
+    an array of shape (nat, nat, 3) holding dCNa/dRb at [a, b]."""
+
+    gradient = np.zeros(shape=(nat, nat, 3), dtype=np.float64)
+    np.add.at(gradient, (i, j), dvec)
+    np.add.at(gradient, (j, j), dvec)
+    np.add.at(gradient, (i, i), -dvec)
+    np.add.at(gradient, (j, i), -dvec)
+
+    return gradient
+
+
 def getProximityShells(
-    at: np.ndarray, coords: np.ndarray, size: Tuple[int, int], threshold: float
+    at: np.ndarray,
+    coords: np.ndarray,
+    size: Tuple[int, int],
+    threshold: float,
+    neighbors=None,
 ):
     """A method to compute atomic proximity shells (prox)."""
 
     from kallisto.data import covalent_radius as rcov
     from kallisto.data import pauling_en
+    from kallisto.neighbors import getNeighborCounts, getNeighborList
     from scipy import special
 
+    at = np.asarray(at)
     nat = len(at)
-    prox1 = np.zeros(shape=(nat,), dtype=np.float64)
-    prox2 = np.zeros(shape=(nat,), dtype=np.float64)
 
     # Fitted to match Wiberg bond orders of diatomic molecules
     k4 = 4.10451
@@ -114,112 +279,221 @@ def getProximityShells(
     # unpack tuple in sizes
     scale1, scale2 = size
 
-    for i in range(nat):
-        ia = at[i] - 1
-        for j in range(nat):
-            if i is j:
-                continue
-            ja = at[j] - 1
-            dx = coords[j][0] - coords[i][0]
-            dy = coords[j][1] - coords[i][1]
-            dz = coords[j][2] - coords[i][2]
-            rSquared = dx * dx + dy * dy + dz * dz
-            if rSquared > threshold:
-                continue
-            r = np.sqrt(rSquared)
-            eni = pauling_en[ia]
-            enj = pauling_en[ja]
-            den = k4 * np.exp(-((np.abs(eni - enj) + k5) ** 2) / k6)
-
-            # smaller border
-            rco = scale1 * (rcov[ia] + rcov[ja])
-            damp = den * 0.5 * (1 + special.erf(-kn * (r - rco) / rco))
-            prox1[i] += damp
-            # larger border
-            rco = scale2 * (rcov[ia] + rcov[ja])
-            damp = den * 0.5 * (1 + special.erf(-kn * (r - rco) / rco))
-            prox2[i] += damp
-
-    return prox2 - prox1
+    if neighbors is None:
+        neighbors = getNeighborList(coords, threshold)
+    i, j, r = neighbors
+
+    ia = at[i] - 1
+    ja = at[j] - 1
+    rcov = np.asarray(rcov)
+    en = np.asarray(pauling_en)
+    den = k4 * np.exp(-((np.abs(en[ia] - en[ja]) + k5) ** 2) / k6)
+
+    # smaller border
+    rco = scale1 * (rcov[ia] + rcov[ja])
+    damp1 = den * 0.5 * (1 + special.erf(-kn * (r - rco) / rco))
+    # larger border
+    rco = scale2 * (rcov[ia] + rcov[ja])
+    damp2 = den * 0.5 * (1 + special.erf(-kn * (r - rco) / rco))
+
+    return getNeighborCounts(nat, i, j, damp2 - damp1)
 
 
 def getAtomicPartialCharges(
-    at: np.ndarray, coords: np.ndarray, cns: np.ndarray, charge: int
+    at: np.ndarray,
+    coords: np.ndarray,
+    cns: np.ndarray,
+    charge: int,
+    factorization=None,
+    solver: str = "direct",
+    tol: float = 1e-8,
 ):
     """A method to compute atomic electronegativity equilibration partial
     charges (eeqs).
 
     EEQ values are calculated for a given structure and are returned as an
-    array."""
+    array. An already available EEQFactorization of the structure can be
+    passed to skip the assembly and factorization of the EEQ matrix. For an
+    array of total charges the result has shape (ncharge, nat).
+
+    The "direct" solver factorizes the dense EEQ matrix. The matrix-free
+    "cg" solver applies the matrix on the fly and iterates until the
+    relative residual is below tol. Its memory grows linearly with the
+    number of atoms (see EEQOperator)."""
+
+    from kallisto.eeq import EEQFactorization, EEQOperator
+    from kallisto.eeq import getConstrainedCharges, solveConjugateGradient
+
+    X = getEEQVector(at, cns)
+
+    if solver == "cg":
+        operator = EEQOperator(at, coords)
+        B = np.stack((X, np.ones(shape=(len(X),), dtype=np.float64)), axis=1)
+        y, e = solveConjugateGradient(operator, B, tol=tol).T
+        return getConstrainedCharges(y, e, charge)
+
+    if solver != "direct":
+        raise ValueError(
+            'EEQ solver "{}" is not implemented. Please use "direct" or "cg".'.format(
+                solver
+            )
+        )
+
+    if factorization is None:
+        factorization = EEQFactorization(getEEQMatrix(at, coords))
+
+    return factorization.get_charges(X, charge)
+
+
+def getEEQParameters(at: np.ndarray):
+    """EEQ parameters of all atoms: electronegativities xi, chemical
+    hardnesses gam, CN scaling factors kappa, and squared charge widths
+    alpha."""
 
     from kallisto.data import eeq_alp, eeq_cnfak, eeq_en, eeq_gamm
-    from numpy import linalg as LA
+
+    z = np.asarray(at) - 1
+    xi = np.asarray(eeq_en)[z]
+    gam = np.asarray(eeq_gamm)[z]
+    kappa = np.asarray(eeq_cnfak)[z]
+    alpha = np.power(np.asarray(eeq_alp)[z], 2)
+
+    return xi, gam, kappa, alpha
+
+
+def getEEQMatrix(at: np.ndarray, coords: np.ndarray) -> np.ndarray:
+    """Symmetric (nat, nat) EEQ interaction matrix without constraints.
+
+    Set up A matrix
+
+            αi -> alpha(i), Jii -> gam(i)
+            γij = 1/√(αi+αj)
+            Aii = Jii + 2/√π·γii
+            Aij = erf(γij·Rij)/Rij = 2/√π·F0(γ²ij·R²ij)
+
+    All entries are evaluated at once from the pair distance matrix."""
+
     from scipy import special
+    from scipy.spatial import distance
 
     # parameter
     sqrt2pi = np.sqrt(2.0 / np.pi)
-    nat = len(at)
 
-    # Lagragian space is +1 in dimensionality
-    m = nat + 1
+    coords = np.asarray(coords, dtype=np.float64)
+    _, gam, _, alpha = getEEQParameters(at)
 
-    # convert lists to numpy arrays for vectorization
-    eeq_alp = np.array(eeq_alp)
-    eeq_cnfak = np.array(eeq_cnfak)
-    eeq_en = np.array(eeq_en)
-    eeq_gamm = np.array(eeq_gamm)
+    r = distance.squareform(distance.pdist(coords))
+    gamij = 1.0 / np.sqrt(alpha[:, np.newaxis] + alpha[np.newaxis, :])
 
-    # setup parameter arrays
-    z = at - 1
-    xi = eeq_en[z]
-    gam = eeq_gamm[z]
-    kappa = eeq_cnfak[z]
-    alpha = np.power(eeq_alp[z], 2)
+    # avoid division by zero on the diagonal, which is set below
+    np.fill_diagonal(r, 1.0)
+    A = special.erf(gamij * r) / r
+    np.fill_diagonal(A, gam + sqrt2pi / np.sqrt(alpha))
 
-    """Set up A matrix and X vector
+    return A
 
-            αi -> alpha(i), ENi -> xi(i), κi -> kappa(i), Jii -> gam(i)
-            γij = 1/√(αi+αj)
-            Xi  = -ENi + κi·√CNi
-            Aii = Jii + 2/√π·γii
-            Aij = erf(γij·Rij)/Rij = 2/√π·F0(γ²ij·R²ij)"""
 
-    # A matrix
-    A = np.zeros(shape=(m, m), dtype=np.float64)
-    for i in range(nat):
-        xyzi = coords[i]
-        A[i][i] = gam[i] + sqrt2pi / np.sqrt(alpha[i])
-        for j in range(nat):
-            if i == j:
-                continue
-            xyzj = coords[j]
-            r = LA.norm(xyzj - xyzi)
-            gamij = 1.0 / np.sqrt(alpha[i] + alpha[j])
-            A[j][i] = special.erf(gamij * r) / r
-            A[i][j] = A[j][i]
-
-    # X vector
-    X = np.zeros(shape=(m,), dtype=np.float64)
-    X[:nat] = -xi + kappa * np.sqrt(cns)
+def getEEQVector(at: np.ndarray, cns: np.ndarray) -> np.ndarray:
+    """EEQ right-hand side Xi = -ENi + κi·√CNi."""
 
-    # setup Lagragian constraints
-    A[:, nat] = 1.0
-    A[nat, :] = 1.0
-    A[nat, nat] = 0.0
-    X[nat] = charge
+    xi, _, kappa, _ = getEEQParameters(at)
 
-    # get eeq charges
-    qs = np.linalg.solve(A, X)
+    return -xi + kappa * np.sqrt(cns)
+
+
+def solveEEQ(A: np.ndarray, X: np.ndarray, charge: int) -> np.ndarray:
+    """Solve the EEQ system under the constraint of a total charge.
+
+    The Lagrangian system [[A, 1], [1, 0]]·[q, λ] = [X, charge] is solved
+    with a Cholesky factorization of the positive-definite block A and a
+    Schur complement for the charge constraint (see EEQFactorization)."""
+
+    from kallisto.eeq import EEQFactorization
+
+    return EEQFactorization(A).get_charges(X, charge)
+
+
+def getAtomicPartialChargeGradient(
+    at: np.ndarray,
+    coords: np.ndarray,
+    cns: np.ndarray,
+    charge: int,
+    threshold: float = 800.0,
+    factorization=None,
+):
+    """A method to compute analytical derivatives of EEQ partial charges.
+
+    Differentiating the constrained EEQ system gives the linear response
+
+            A·dq + dλ·1 = dX - dA·q,  1·dq = 0,
+
+    with dXa = κa/(2√CNa)·dCNa from the covalent CN derivatives. All 3·nat
+    right-hand sides are solved with one (reusable) EEQFactorization.
+    Returns an array of shape (nat, nat, 3) holding dqa/dRb at [a, b]."""
+
+    from scipy import special
+    from scipy.spatial import distance
+
+    from kallisto.eeq import EEQFactorization
+
+    coords = np.asarray(coords, dtype=np.float64)
+    cns = np.asarray(cns, dtype=np.float64)
+    nat = len(coords)
 
-    return qs[:-1]
+    if factorization is None:
+        factorization = EEQFactorization(getEEQMatrix(at, coords))
 
+    qs = factorization.get_charges(getEEQVector(at, cns), charge)
 
-def getPolarizabilities(at: np.ndarray, covcn: np.ndarray, qs: np.ndarray, charge: int):
+    # dX from the covalent CN derivatives
+    _, _, kappa, alpha = getEEQParameters(at)
+    i, j, dcn = getCoordinationNumberGradient(at, coords, "cov", threshold)
+    # isolated atoms (CN = 0) do not respond
+    safe = np.where(cns > 0.0, cns, 1.0)
+    dxdcn = np.where(cns > 0.0, 0.5 * kappa / np.sqrt(safe), 0.0)
+    dX = dxdcn[:, np.newaxis, np.newaxis] * getDenseGradient(nat, i, j, dcn)
+
+    # dAac/dRa = d/dr[erf(γ·r)/r]·(Ra-Rc)/r
+    diff = coords[:, np.newaxis, :] - coords[np.newaxis, :, :]
+    r = distance.squareform(distance.pdist(coords))
+    np.fill_diagonal(r, 1.0)
+    gamij = 1.0 / np.sqrt(alpha[:, np.newaxis] + alpha[np.newaxis, :])
+    dgdr = (
+        2.0 * gamij / np.sqrt(np.pi) * np.exp(-((gamij * r) ** 2)) * r
+        - special.erf(gamij * r)
+    ) / r**2
+    np.fill_diagonal(dgdr, 0.0)
+    dA = (dgdr / r)[:, :, np.newaxis] * diff
+
+    # (dA·q)[a, b] = δab·Σc dAac·qc - dAab·qb
+    dAq = -dA * qs[np.newaxis, :, np.newaxis]
+    dAq[np.arange(nat), np.arange(nat)] += np.einsum("acx,c->ax", dA, qs)
+
+    # solve all 3·nat right-hand sides for a vanishing total charge change
+    rhs = (dX - dAq).reshape(nat, 3 * nat).T
+    dq = factorization.get_charges(rhs, 0.0)
+
+    return dq.T.reshape(nat, nat, 3)
+
+
+def getPolarizabilities(
+    at: np.ndarray,
+    covcn: np.ndarray,
+    qs: np.ndarray,
+    charge: int,
+    vectorized: bool = True,
+):
     """A method to compute atomic-charge dependent dynamic atomic polarizabilities (alps).
 
     ALP values are calculated for a given structure and are returned as an
     array. For the charge dependency EEQ atomic partial charges are used
-    in an empirical scaling function as used in the dftd4 program."""
+    in an empirical scaling function as used in the dftd4 program. By
+    default the cached element reference tables and array operations over
+    all atoms and reference systems are used, vectorized=False selects the
+    reference loops."""
+
+    if vectorized:
+        return getDynamicPolarizabilities(at, covcn, qs, charge)[:, 0]
 
     from kallisto.data.alpha import refx, refh, hcount, ascale, refn
     from kallisto.data.alpha import refcn, refsys, alphaiw, zeff
@@ -311,67 +585,107 @@ def getPolarizabilities(at: np.ndarray, covcn: np.ndarray, qs: np.ndarray, charg
     return atomicAiw
 
 
+def getDynamicPolarizabilities(
+    at: np.ndarray, covcn: np.ndarray, qs: np.ndarray, charge: int
+) -> np.ndarray:
+    """A method to compute atomic-charge dependent dynamic atomic
+    polarizabilities α(iω) at all 23 imaginary frequencies of the dftd4
+    frequency grid. Returns a contiguous (nat, 23) array, where the first
+    column holds the static polarizabilities."""
+
+    return np.ascontiguousarray(getDynamicPolarizabilitiesBatch(at, covcn, qs, charge))
+
+
+def getC6Coefficients(aw: np.ndarray) -> np.ndarray:
+    """A method to compute pairwise C6 dispersion coefficients.
+
+    Dynamic polarizabilities aw of shape (..., nat, 23) are integrated
+    with the Casimir-Polder formula
+
+            C6ij = 3/π ∫ αi(iω)·αj(iω) dω
+
+    on the trapezoidal frequency grid of dftd4, which is evaluated for all
+    pairs as one matrix product. Returns an array of shape (..., nat, nat)."""
+
+    from kallisto.data.alpha import weights
+
+    thopi = 3.0 / np.pi
+    aw = np.asarray(aw, dtype=np.float64)
+
+    return thopi * np.matmul(aw * weights, np.swapaxes(aw, -1, -2))
+
+
+def getSparseC6Coefficients(
+    aw: np.ndarray, coords: np.ndarray, threshold: float, neighbors=None
+):
+    """A method to compute C6 dispersion coefficients of atom pairs within
+    a cutoff (squared distance in Bohr^2).
+
+    Returns (i, j, c6) for all pairs with i < j from a neighbor list, such
+    that memory scales with the number of pairs instead of nat^2."""
+
+    from kallisto.data.alpha import weights
+    from kallisto.neighbors import getNeighborList
+
+    thopi = 3.0 / np.pi
+    aw = np.asarray(aw, dtype=np.float64)
+
+    if neighbors is None:
+        neighbors = getNeighborList(coords, threshold)
+    i, j, _ = neighbors
+
+    return i, j, thopi * np.einsum("pf,f,pf->p", aw[i], weights, aw[j])
+
+
+def getMolecularC6(aw: np.ndarray):
+    """A method to compute the molecular C6 coefficient, i.e., the sum of
+    all pairwise C6 coefficients, from the molecular polarizability."""
+
+    from kallisto.data.alpha import weights
+
+    thopi = 3.0 / np.pi
+    molecular = np.sum(np.asarray(aw, dtype=np.float64), axis=-2)
+
+    return thopi * np.sum(weights * molecular**2, axis=-1)
+
+
 def getCovalentBondingPartner(
     at: np.ndarray,
     coords: np.ndarray,
     partner: str,
     thresholdBond: float,
     thresholdCN: float,
+    neighbors=None,
 ):
     """A method to compute an index table for covalent bonding partner.
 
     thresholdBond defines the treshold for a covalent bond."""
 
-    from kallisto.data import covalent_radius as rcov
-
-    # parameter
-    k1 = 16.0
+    from kallisto.neighbors import getNeighborList
 
+    at = np.asarray(at)
     nat = len(at)
 
-    btbl = np.zeros(shape=(nat, nat), dtype=np.int32)
+    if neighbors is None:
+        neighbors = getNeighborList(coords, thresholdCN)
+    i, j, r = neighbors
 
-    for i in range(nat):
-        ia = at[i] - 1
-        for j in range(nat):
-            if i is j:
-                continue
-            dx = coords[j][0] - coords[i][0]
-            dy = coords[j][1] - coords[i][1]
-            dz = coords[j][2] - coords[i][2]
-            rSquared = dx * dx + dy * dy + dz * dz
-            if rSquared > thresholdCN:
-                continue
-            ja = at[j] - 1
-            r = np.sqrt(rSquared)
-            rco = rcov[ia] + rcov[ja]
-            rr = rco / r
-            alpha = -k1 * (rr - 1.0)
-            damp = 1.0 / (1.0 + np.exp(alpha))
-            if damp > thresholdBond:
-                btbl[i][j] = 1
+    damp = getCoordinationNumberDamping(at[i], at[j], r, "exp")
+    bonded = damp > thresholdBond
+
+    # symmetric index table sorted by atom and partner
+    first = np.concatenate((i[bonded], j[bonded]))
+    second = np.concatenate((j[bonded], i[bonded]))
+    order = np.lexsort((second, first))
+    counts = np.bincount(first, minlength=nat)
+    covalentList = [p.tolist() for p in np.split(second[order], np.cumsum(counts)[:-1])]
 
     if partner == "X":
         # Get covalent bonding partners for all atoms
-        covalentList = []
-        for i in range(nat):
-            covalentPartner = []
-            k = 0
-            for elem in btbl[i][:]:
-                if elem == 1:
-                    covalentPartner.append(k)
-                k += 1
-            covalentList.append(covalentPartner)
         return covalentList
     else:
         # Get covalent bonding partners of atom #partner
-        covalentPartner = []
-        k = 0
-        for elem in btbl[int(partner)][:]:
-            if elem == 1:
-                covalentPartner.append(k)
-            k += 1
-        return covalentPartner
+        return covalentList[int(partner)]
 
 
 def getVanDerWaalsRadii(
@@ -410,3 +724,344 @@ def getVanDerWaalsRadii(
             vdw[i] = scale * theta_b * theta_a * np.power(aw[i], osev)
 
     return vdw
+
+
+def getPairIndices(nat: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices (i, j) with i < j of all atom pairs."""
+
+    return np.triu_indices(nat, k=1)
+
+
+def getPairDistancesBatch(coords: np.ndarray, i: np.ndarray, j: np.ndarray):
+    """Squared distances of atom pairs (i, j) for a stack of structures."""
+
+    diff = coords[..., j, :] - coords[..., i, :]
+    return np.einsum("...k,...k->...", diff, diff)
+
+
+def reducePairsBatch(nat: int, i: np.ndarray, j: np.ndarray, weights: np.ndarray):
+    """Reduce symmetric pair contributions (nbatch, npairs) onto atoms."""
+
+    nbatch = weights.shape[0]
+    offset = (np.arange(nbatch) * nat)[:, np.newaxis]
+    size = nbatch * nat
+    out = np.bincount((offset + i).ravel(), weights=weights.ravel(), minlength=size)
+    out += np.bincount((offset + j).ravel(), weights=weights.ravel(), minlength=size)
+    return out.reshape(nbatch, nat)
+
+
+def getPairMask(mask, i: np.ndarray, j: np.ndarray):
+    """Pairs (i, j) of which both atoms are present in a padded batch."""
+
+    if mask is None:
+        return True
+    mask = np.asarray(mask, dtype=bool)
+    return mask[..., i] & mask[..., j]
+
+
+def getCoordinationNumbersBatch(
+    at: np.ndarray, coords: np.ndarray, cntype: str, threshold: float, mask=None
+):
+    """A method to compute coordination numbers (cns) for a stack of structures.
+
+    Positions are given as (nbatch, nat, 3) array. Atomic numbers are either
+    shared (nat,) or given per structure (nbatch, nat), where padded atoms
+    have number 0 and are excluded via the boolean mask (nbatch, nat).
+    Element-dependent pair terms are evaluated once and applied to all
+    structures. Returns an (nbatch, nat) array."""
+
+    at = np.asarray(at)
+    coords = np.asarray(coords, dtype=np.float64)
+    nat = at.shape[-1]
+
+    i, j = getPairIndices(nat)
+    rSquared = getPairDistancesBatch(coords, i, j)
+    inside = (rSquared <= threshold) & getPairMask(mask, i, j)
+    r = np.sqrt(np.where(inside, rSquared, 1.0))
+
+    damp = getCoordinationNumberDamping(at[..., i], at[..., j], r, cntype)
+    damp = np.where(inside, damp, 0.0)
+
+    return reducePairsBatch(nat, i, j, damp)
+
+
+def getProximityShellsBatch(
+    at: np.ndarray,
+    coords: np.ndarray,
+    size: Tuple[int, int],
+    threshold: float,
+    mask=None,
+):
+    """A method to compute atomic proximity shells (prox) for a stack of
+    structures given as (nbatch, nat, 3) array and an optional atom mask."""
+
+    from kallisto.data import covalent_radius as rcov
+    from kallisto.data import pauling_en
+    from scipy import special
+
+    at = np.asarray(at)
+    coords = np.asarray(coords, dtype=np.float64)
+    nat = at.shape[-1]
+
+    # Fitted to match Wiberg bond orders of diatomic molecules
+    k4 = 4.10451
+    k5 = 19.08857
+    k6 = 2 * 11.28174**2
+
+    kn = 7.50
+    threshold = 800.0
+
+    # unpack tuple in sizes
+    scale1, scale2 = size
+
+    i, j = getPairIndices(nat)
+    rSquared = getPairDistancesBatch(coords, i, j)
+    inside = (rSquared <= threshold) & getPairMask(mask, i, j)
+    r = np.sqrt(np.where(inside, rSquared, 1.0))
+
+    # element-dependent pair terms
+    ia = at[..., i] - 1
+    ja = at[..., j] - 1
+    rcov = np.asarray(rcov)
+    en = np.asarray(pauling_en)
+    den = k4 * np.exp(-((np.abs(en[ia] - en[ja]) + k5) ** 2) / k6)
+    rco1 = scale1 * (rcov[ia] + rcov[ja])
+    rco2 = scale2 * (rcov[ia] + rcov[ja])
+
+    damp1 = den * 0.5 * (1 + special.erf(-kn * (r - rco1) / rco1))
+    damp2 = den * 0.5 * (1 + special.erf(-kn * (r - rco2) / rco2))
+
+    return reducePairsBatch(nat, i, j, np.where(inside, damp2 - damp1, 0.0))
+
+
+def getAtomicPartialChargesBatch(
+    at: np.ndarray, coords: np.ndarray, cns: np.ndarray, charge, mask=None
+):
+    """A method to compute atomic electronegativity equilibration partial
+    charges (eeqs) for a stack of structures.
+
+    Positions are given as (nbatch, nat, 3) array and covalent CNs as
+    (nbatch, nat) array. The total charge is a single value or one value
+    per structure. Padded atoms (mask is False) are decoupled from the
+    system and get zero charge. All EEQ systems are assembled from
+    array-level pair distances and solved in one batched call."""
+
+    from scipy import special
+
+    # parameter
+    sqrt2pi = np.sqrt(2.0 / np.pi)
+
+    at = np.asarray(at)
+    coords = np.asarray(coords, dtype=np.float64)
+    cns = np.asarray(cns, dtype=np.float64)
+    nbatch, nat = coords.shape[0], coords.shape[1]
+
+    if mask is None:
+        mask = np.ones(shape=(nbatch, nat), dtype=bool)
+    mask = np.broadcast_to(np.asarray(mask, dtype=bool), (nbatch, nat))
+
+    # Lagragian space is +1 in dimensionality
+    m = nat + 1
+
+    # setup parameter arrays
+    xi, gam, kappa, alpha = getEEQParameters(at)
+
+    # γij = 1/√(αi+αj) and Aii = Jii + 2/√π·γii
+    gamij = 1.0 / np.sqrt(alpha[..., :, np.newaxis] + alpha[..., np.newaxis, :])
+    diagonal = gam + sqrt2pi / np.sqrt(alpha)
+
+    # Aij = erf(γij·Rij)/Rij
+    diff = coords[:, np.newaxis, :, :] - coords[:, :, np.newaxis, :]
+    pair = mask[:, :, np.newaxis] & mask[:, np.newaxis, :]
+    pair &= ~np.eye(nat, dtype=bool)
+    r = np.sqrt(np.einsum("bijk,bijk->bij", diff, diff))
+    r = np.where(pair, r, 1.0)
+
+    A = np.zeros(shape=(nbatch, m, m), dtype=np.float64)
+    A[:, :nat, :nat] = np.where(pair, special.erf(gamij * r) / r, 0.0)
+    A[:, np.arange(nat), np.arange(nat)] = np.where(mask, diagonal, 1.0)
+
+    # setup Lagragian constraints
+    A[:, :nat, nat] = mask
+    A[:, nat, :nat] = mask
+    A[:, nat, nat] = 0.0
+
+    X = np.zeros(shape=(nbatch, m), dtype=np.float64)
+    X[:, :nat] = np.where(mask, -xi + kappa * np.sqrt(cns), 0.0)
+    X[:, nat] = charge
+
+    # get eeq charges
+    qs = np.linalg.solve(A, X[..., np.newaxis])[..., 0]
+
+    return qs[:, :nat]
+
+
+def getReferencePolarizabilities(ia: np.ndarray):
+    """Charge-independent reference data of elements ia (atomic number - 1).
+
+    Returns the reference polarizabilities alphar (23, 7, nel) and the
+    number of Gaussian weighting functions ncount (7, nel) of each
+    reference system, gathered from the cached tables of all elements."""
+
+    alphar, ncount = getReferenceTables()
+    ia = np.asarray(ia)
+
+    return alphar[:, :, ia], ncount[:, ia]
+
+
+@lru_cache(maxsize=None)
+def getReferenceTables() -> Tuple[np.ndarray, np.ndarray]:
+    """Reference polarizabilities alphar (23, 7, 86) and number of Gaussian
+    weighting functions ncount (7, 86) of all elements.
+
+    The tables only depend on the element and are set up once per process.
+    The returned arrays are read-only."""
+
+    alphar, ncount = setupReferencePolarizabilities(np.arange(86))
+    alphar.setflags(write=False)
+    ncount.setflags(write=False)
+
+    return alphar, ncount
+
+
+def setupReferencePolarizabilities(ia: np.ndarray):
+    """Set up the charge-independent reference data of elements ia.
+
+    Returns the reference polarizabilities alphar (23, 7, nel) and the
+    number of Gaussian weighting functions ncount (7, nel) of each
+    reference system, which only depend on the element."""
+
+    from kallisto.data.alpha import alphaiw, ascale, gam, hcount, refcn
+    from kallisto.data.alpha import refh, refn, refsys, sscale, seciw, zeff
+    from kallisto.utils.alpha import zeta
+
+    # parameter
+    g_a = 3.0
+    g_c = 2.0
+
+    ia = np.asarray(ia)
+    zeff = np.asarray(zeff)
+    gam = np.asarray(gam)
+
+    # reference systems that are defined for each element
+    valid = np.arange(7)[:, np.newaxis] < np.asarray(refn)[ia]
+
+    # charge scaled polarizabilities of the reference systems
+    refis = refsys[:, ia] - 1
+    refiz = zeff[refis]
+    scaled = zeta(g_a, g_c * gam[refis], refiz, refh[:, ia] + refiz)
+    alpha = sscale[refis] * seciw[:, refis] * scaled
+    alphar = np.maximum(
+        ascale[:, ia] * (alphaiw[:, :, ia] - hcount[:, ia] * alpha),
+        0,
+    )
+    alphar = np.where(valid, alphar, 0.0)
+
+    # count reference systems with the same (rounded) CN
+    icn = np.rint(refcn[:, ia]).astype(np.int64)
+    same = (icn[:, np.newaxis, :] == icn[np.newaxis, :, :]) & valid[np.newaxis]
+    cncount = np.sum(same, axis=1) + (icn == 0)
+    ncount = np.where(valid, cncount * (cncount + 1) // 2, 0)
+
+    return alphar, ncount
+
+
+def getDynamicPolarizabilitiesBatch(
+    at: np.ndarray, covcn: np.ndarray, qs: np.ndarray, charge, mask=None
+):
+    """A method to compute atomic-charge dependent dynamic atomic
+    polarizabilities for a stack of structures.
+
+    Covalent CNs and EEQ charges are given as (nbatch, nat) arrays, atomic
+    numbers either shared (nat,) or per structure (nbatch, nat). The
+    element-only reference data is gathered once per topology, the
+    Gaussian CN weighting and charge scaling are evaluated as array
+    operations. Padded atoms (mask is False) get zero polarizability.
+    Returns an (nbatch, nat, 23) array."""
+
+    from kallisto.data.alpha import gam, refcn, refx, zeff
+    from kallisto.utils.alpha import zeta
+
+    # parameter
+    g_a = 3.0
+    g_c = 2.0
+    wf = 6.0
+
+    at = np.asarray(at)
+    covcn = np.asarray(covcn, dtype=np.float64)
+    qs = np.asarray(qs, dtype=np.float64)
+
+    # element-only data gathered once per topology, shape (..., nat, 7)
+    ia = at - 1
+    elements, inverse = np.unique(ia.ravel(), return_inverse=True)
+    inverse = inverse.reshape(ia.shape)
+    alphar, ncount = getReferencePolarizabilities(elements)
+    alphar = np.moveaxis(alphar[:, :, inverse], (0, 1), (-1, -2))
+    ncount = np.moveaxis(ncount[:, inverse], 0, -1)
+    cnref = np.moveaxis(refcn[:, ia], 0, -1)
+    xref = np.moveaxis(refx[:, ia], 0, -1)
+
+    # Gaussian weights of the reference systems
+    nmax = max(int(np.max(ncount)), 1)
+    twf = (np.arange(nmax) + 1) * wf
+    counted = np.arange(nmax) < ncount[..., np.newaxis]
+    dcn = covcn[..., np.newaxis] - cnref
+    gauss = np.exp(-twf * dcn[..., np.newaxis] ** 2)
+    gauss = np.sum(np.where(counted, gauss, 0.0), axis=-1)
+    norm = 1.0 / np.sum(gauss, axis=-1)
+    gw = gauss * norm[..., np.newaxis]
+
+    # charge scaling
+    iz = np.asarray(zeff)[ia]
+    scale = zeta(
+        g_a,
+        (g_c * np.asarray(gam)[ia])[..., np.newaxis],
+        xref + iz[..., np.newaxis],
+        (qs + iz)[..., np.newaxis],
+    )
+
+    aw = np.einsum("...r,...rf->...f", gw * scale, alphar)
+    if mask is not None:
+        aw = np.where(np.asarray(mask, dtype=bool)[..., np.newaxis], aw, 0.0)
+
+    return aw
+
+
+def getPolarizabilitiesBatch(
+    at: np.ndarray, covcn: np.ndarray, qs: np.ndarray, charge, mask=None
+):
+    """A method to compute static atomic polarizabilities (alps) for a stack
+    of structures. Returns an (nbatch, nat) array."""
+
+    return getDynamicPolarizabilitiesBatch(at, covcn, qs, charge, mask=mask)[..., 0]
+
+
+def getVanDerWaalsRadiiBatch(
+    at: np.ndarray, aw: np.ndarray, vdwtype: str, scale: float
+):
+    """A method to compute van der Waals radii (vdws) from static atomic
+    polarizabilities given as array of any leading shape. Padded atoms
+    (atomic number 0) get zero radius."""
+
+    from kallisto.data import chemical_symbols
+    from kallisto.data.vdw import rahm, truhlar
+
+    osev = 1.0 / 7.0
+    # Empirical scaling and theta_a value from DOI:
+    # 10.1103/PhysRevLett.121.183401
+    theta_a = 2.54
+
+    if vdwtype == "truhlar":
+        table = truhlar
+    elif vdwtype == "rahm":
+        table = rahm
+    else:
+        return np.zeros_like(aw)
+
+    elements, inverse = np.unique(np.ravel(at), return_inverse=True)
+    theta_b = np.array(
+        [table[chemical_symbols[ia]] if ia > 0 else 0.0 for ia in elements]
+    )
+    theta_b = theta_b[inverse].reshape(np.shape(at))
+
+    return scale * theta_b * theta_a * np.power(aw, osev)
@@ -1,4 +1,5 @@
 # src/kallisto/molecule.py
+import copy
 import os
 from typing import Tuple
 
@@ -25,7 +26,11 @@ class Molecule(object):
     numbers: list of int
         Atomic nuclear charges.
     charges: list of float
-        Atomic charges."""
+        Atomic charges.
+
+    Derived features (cns, prox, bonds, eeq, alp, vdw) are memoized per
+    molecule and keyed by feature name and parameters. The cache is
+    invalidated whenever an array is changed through new_array or set_array."""
 
     def __init__(
         self,
@@ -61,6 +66,7 @@ class Molecule(object):
                 positions = molecule.get_positions()
 
         self.arrays = {}
+        self.cache = {}
 
         if symbols is None:
             if numbers is None:
@@ -108,6 +114,7 @@ class Molecule(object):
             break
 
         self.arrays[name] = a
+        self.cache.clear()
 
     # Setter methods
     def set_array(self, name, a, dtype=None, shape=None):
@@ -129,6 +136,7 @@ class Molecule(object):
                         )
                     )
                 b[:] = a
+        self.cache.clear()
 
     # Getter methods
     def get_array(self, name, copy=True):
@@ -145,7 +153,7 @@ class Molecule(object):
 
     def get_positions(self):
         """Get positions-array."""
-        return self.arrays["positions"]
+        return self.arrays["positions"].copy()
 
     def copy(self):
         """Return a copy."""
@@ -156,9 +164,16 @@ class Molecule(object):
             molecule.arrays[name] = a.copy()
         return molecule
 
+    def get_cached(self, key: tuple, compute):
+        """Get a derived feature from the cache or compute and store it."""
+
+        if key not in self.cache:
+            self.cache[key] = compute()
+        return copy.deepcopy(self.cache[key])
+
     def get_number_of_atoms(self):
         """Get integer number of atoms."""
-        return len(self.get_positions())
+        return len(self.arrays["positions"])
 
     def get_bonds(self, partner="X", thresholdBond=0.6, thresholdCN=800.0):
         """Get an index table for covalent bonding partner.
@@ -169,8 +184,11 @@ class Molecule(object):
 
         at = self.get_atomic_numbers()
         coords = self.get_positions()
-        return getCovalentBondingPartner(
-            at, coords, partner, thresholdBond, thresholdCN
+        return self.get_cached(
+            ("bonds", partner, thresholdBond, thresholdCN),
+            lambda: getCovalentBondingPartner(
+                at, coords, partner, thresholdBond, thresholdCN
+            ),
         )
 
     def get_cns(self, cntype: str, threshold=800.0):
@@ -184,7 +202,25 @@ class Molecule(object):
 
         at = self.get_atomic_numbers()
         coords = self.get_positions()
-        return getCoordinationNumbers(at, coords, cntype, threshold)
+        return self.get_cached(
+            ("cns", cntype, threshold),
+            lambda: getCoordinationNumbers(at, coords, cntype, threshold),
+        )
+
+    def get_cns_gradient(self, cntype: str, threshold=800.0):
+        """Get analytical derivatives of coordination numbers (cns).
+
+        Returns pair-wise derivatives (i, j, dcn), see
+        getCoordinationNumberGradient."""
+
+        from kallisto.methods import getCoordinationNumberGradient
+
+        at = self.get_atomic_numbers()
+        coords = self.get_positions()
+        return self.get_cached(
+            ("cnsgradient", cntype, threshold),
+            lambda: getCoordinationNumberGradient(at, coords, cntype, threshold),
+        )
 
     def get_prox(self, size: Tuple[int, int], threshold=800.0):
         """Get atomic proximity shells (prox)."""
@@ -193,7 +229,10 @@ class Molecule(object):
 
         at = self.get_atomic_numbers()
         coords = self.get_positions()
-        return getProximityShells(at, coords, size, threshold)
+        return self.get_cached(
+            ("prox", tuple(size), threshold),
+            lambda: getProximityShells(at, coords, size, threshold),
+        )
 
     def get_vdw(self, charge: int, vdwtype: str, scale: float):
         """Get atomic-charge dependent van der Waals radii (vdws).
@@ -206,35 +245,186 @@ class Molecule(object):
 
         at = self.get_atomic_numbers()
         nat = self.get_number_of_atoms()
-        aiw = self.get_alp(charge=charge)
-        return getVanDerWaalsRadii(nat, at, aiw, vdwtype, scale)
+        return self.get_cached(
+            ("vdw", charge, vdwtype, scale),
+            lambda: getVanDerWaalsRadii(
+                nat, at, self.get_alp(charge=charge), vdwtype, scale
+            ),
+        )
 
-    def get_alp(self, charge: int):
+    def get_alp(self, charge: int, dynamic: bool = False):
         """Get atomic-charge dependent dynamic atomic polarizabilities (alps).
 
         ALP values are calculated for a given structure and are returned as an
         array. For the charge dependency EEQ atomic partial charges are used
-        in an empirical scaling function as used in the dftd4 program."""
+        in an empirical scaling function as used in the dftd4 program. With
+        dynamic=True the polarizabilities at all 23 imaginary frequencies
+        are returned as (nat, 23) array, the static values are its first
+        column."""
 
-        from kallisto.methods import getPolarizabilities
+        from kallisto.methods import getDynamicPolarizabilities
 
         at = self.get_atomic_numbers()
-        covcn = self.get_cns(cntype="cov")
-        qs = self.get_eeq(charge)
-        return getPolarizabilities(at, covcn, qs, charge)
+        if dynamic:
+            return self.get_cached(
+                ("alpiw", charge),
+                lambda: getDynamicPolarizabilities(
+                    at, self.get_cns(cntype="cov"), self.get_eeq(charge), charge
+                ),
+            )
+
+        return self.get_cached(
+            ("alp", charge),
+            lambda: np.ascontiguousarray(self.get_alp(charge, dynamic=True)[:, 0]),
+        )
+
+    def get_c6(self, charge: int, threshold=None):
+        """Get pairwise C6 dispersion coefficients.
+
+        Returns the (nat, nat) C6 matrix from Casimir-Polder integration of
+        the dynamic polarizabilities. With a threshold (squared distance in
+        Bohr^2) only pairs within the cutoff are returned as (i, j, c6)."""
+
+        from kallisto.methods import getC6Coefficients, getSparseC6Coefficients
+
+        if threshold is not None:
+            coords = self.get_positions()
+            return self.get_cached(
+                ("c6", charge, threshold),
+                lambda: getSparseC6Coefficients(
+                    self.get_alp(charge, dynamic=True), coords, threshold
+                ),
+            )
+
+        return self.get_cached(
+            ("c6", charge),
+            lambda: getC6Coefficients(self.get_alp(charge, dynamic=True)),
+        )
+
+    def get_molecular_c6(self, charge: int):
+        """Get the molecular C6 dispersion coefficient."""
+
+        from kallisto.methods import getMolecularC6
+
+        return self.get_cached(
+            ("molecularC6", charge),
+            lambda: getMolecularC6(self.get_alp(charge, dynamic=True)),
+        )
+
+    def get_dispersion(self, charge: int):
+        """Get atom-resolved dispersion energies in Hartree.
 
-    def get_eeq(self, charge: int):
+        D4-style two-body and Axilrod-Teller-Muto three-body energies from
+        dynamic polarizabilities and van der Waals radii (rahm), see
+        kallisto.dispersion. The total energy is the sum over atoms."""
+
+        from kallisto.dispersion import getDispersionEnergies
+
+        coords = self.get_positions()
+        return self.get_cached(
+            ("disp", charge),
+            lambda: getDispersionEnergies(
+                coords,
+                self.get_alp(charge, dynamic=True),
+                self.get_vdw(charge, "rahm", 1.0),
+            ),
+        )
+
+    def get_eeq(self, charge: int, solver="direct", tol=1e-8):
         """Get atomic electronegativity equilibration partial charges (eeqs).
 
         EEQ values are calculated for a given structure and are returned as an
-        array."""
+        array. The matrix-free solver "cg" avoids the dense EEQ matrix for
+        large systems, see getAtomicPartialCharges."""
 
         from kallisto.methods import getAtomicPartialCharges
 
         at = self.get_atomic_numbers()
         coords = self.get_positions()
-        cns = self.get_cns(cntype="cov")
-        return getAtomicPartialCharges(at, coords, cns, charge)
+
+        if solver != "direct":
+            return self.get_cached(
+                ("eeq", charge, solver, tol),
+                lambda: getAtomicPartialCharges(
+                    at,
+                    coords,
+                    self.get_cns(cntype="cov"),
+                    charge,
+                    solver=solver,
+                    tol=tol,
+                ),
+            )
+
+        return self.get_cached(
+            ("eeq", charge),
+            lambda: getAtomicPartialCharges(
+                at,
+                coords,
+                self.get_cns(cntype="cov"),
+                charge,
+                factorization=self.get_eeq_factorization(),
+            ),
+        )
+
+    def get_eeq_gradient(self, charge: int):
+        """Get analytical derivatives of EEQ partial charges.
+
+        Returns an array of shape (nat, nat, 3) holding dqa/dRb at [a, b].
+        The EEQ factorization of the geometry is reused."""
+
+        from kallisto.methods import getAtomicPartialChargeGradient
+
+        at = self.get_atomic_numbers()
+        coords = self.get_positions()
+        return self.get_cached(
+            ("eeqgradient", charge),
+            lambda: getAtomicPartialChargeGradient(
+                at,
+                coords,
+                self.get_cns(cntype="cov"),
+                charge,
+                factorization=self.get_eeq_factorization(),
+            ),
+        )
+
+    def get_eeq_scan(self, charges):
+        """Get EEQ partial charges for several total charges at once.
+
+        The EEQ matrix is factorized only once per geometry. Returns an
+        array of shape (ncharge, nat) and stores each row in the cache such
+        that get_alp and get_vdw reuse it."""
+
+        from kallisto.methods import getAtomicPartialCharges
+
+        at = self.get_atomic_numbers()
+        coords = self.get_positions()
+        qs = getAtomicPartialCharges(
+            at,
+            coords,
+            self.get_cns(cntype="cov"),
+            np.asarray(charges),
+            factorization=self.get_eeq_factorization(),
+        )
+        for charge, q in zip(charges, qs, strict=True):
+            self.cache.setdefault(("eeq", charge), q)
+
+        return qs.copy()
+
+    def get_eeq_factorization(self):
+        """Get the factorized EEQ matrix (EEQFactorization) of the geometry.
+
+        The factorization does not depend on the total charge and is shared
+        by all EEQ based features. It is cached but not copied."""
+
+        from kallisto.eeq import EEQFactorization
+        from kallisto.methods import getEEQMatrix
+
+        key = ("eeqfactorization",)
+        if key not in self.cache:
+            at = self.get_atomic_numbers()
+            coords = self.get_positions()
+            self.cache[key] = EEQFactorization(getEEQMatrix(at, coords))
+        return self.cache[key]
 
     def writeMolecule(self, name: str, path=cwd):
         """Write molecular structure."""
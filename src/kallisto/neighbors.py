@@ -0,0 +1,53 @@
+# src/kallisto/neighbors.py
+from typing import Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def getNeighborList(
+    coords: np.ndarray, threshold: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """A method to get all atom pairs within a cutoff.
+
+    The threshold is a squared distance in Bohr^2 as used by the pairwise
+    kernels in kallisto.methods. Pairs are found with a KD-tree such that
+    the cost scales linearly with the number of atoms. Each pair (i, j) is
+    returned once with i < j, sorted by i and then j, together with its
+    distance r."""
+
+    coords = np.asarray(coords, dtype=np.float64)
+    nat = len(coords)
+
+    if nat < 2:
+        empty = np.zeros(shape=(0,), dtype=np.int64)
+        return empty, empty.copy(), np.zeros(shape=(0,), dtype=np.float64)
+
+    # slightly enlarged search radius, the exact threshold is applied below
+    cutoff = np.sqrt(threshold) * (1.0 + 1e-10)
+    tree = cKDTree(coords)
+    pairs = tree.query_pairs(r=cutoff, output_type="ndarray")
+    i = pairs[:, 0].astype(np.int64)
+    j = pairs[:, 1].astype(np.int64)
+
+    diff = coords[j] - coords[i]
+    rSquared = np.einsum("ij,ij->i", diff, diff)
+    mask = rSquared <= threshold
+    i, j, rSquared = i[mask], j[mask], rSquared[mask]
+
+    order = np.lexsort((j, i))
+
+    return i[order], j[order], np.sqrt(rSquared[order])
+
+
+def getNeighborCounts(nat: int, i: np.ndarray, j: np.ndarray, weights: np.ndarray):
+    """Reduce symmetric pair contributions onto both atoms of each pair.
+
+    Always returns float64, also without any pairs (bincount gives int64
+    for empty weights)."""
+
+    counts = np.bincount(i, weights=weights, minlength=nat) + np.bincount(
+        j, weights=weights, minlength=nat
+    )
+
+    return counts.astype(np.float64, copy=False)
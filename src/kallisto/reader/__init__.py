@@ -0,0 +1,17 @@
+# src/kallisto/reader/__init__.py
+from typing import List
+
+import numpy as np
+
+from kallisto.data import atomic_numbers
+
+
+def getAtomicNumbers(symbols: List[str]) -> np.ndarray:
+    """Convert raw atom types (any case) into an array of atomic numbers."""
+
+    unique, inverse = np.unique(np.array(symbols, dtype=str), return_inverse=True)
+    numbers = np.array(
+        [atomic_numbers[symbol[0].upper() + symbol[1:].lower()] for symbol in unique],
+        dtype=int,
+    )
+    return numbers[inverse.reshape(-1)]
@@ -1,28 +1,44 @@
 # src/kallisto/reader/strucreader.py
-from typing import TextIO
+import io
+from typing import Iterator, TextIO, Tuple
 
 import click
+import numpy as np
 
 import kallisto.reader.turbomole as tm
 import kallisto.reader.xyz as xyz
 from kallisto.molecule import Molecule
 from kallisto.utils import errorbye
 
+# Number of characters that are inspected to detect the file type
+sniffSize = 4096
+
 
 def constructMolecule(geometry: str, out: click.File) -> Molecule:
     """Helper function to construct a Molecule."""
     try:
-        with open(geometry, "r+") as fileObject:
-            # read atoms from input file
-            atoms = read(fileObject)
-            # create molecule from atoms
-            molecule = Molecule(symbols=atoms)
+        with open(geometry, "r") as fileObject:
+            # read atomic numbers and positions from input file
+            numbers, positions = readArrays(fileObject)
+            # create molecule from arrays
+            molecule = Molecule(numbers=numbers, positions=positions)
     except FileNotFoundError:
         errorbye("Input file not found.")
 
     return molecule
 
 
+def iterMolecules(geometry: str) -> Iterator[Molecule]:
+    """Generator over all structures (frames) of an input file."""
+
+    try:
+        with open(geometry, "r") as fileObject:
+            for numbers, positions in iterArrays(fileObject):
+                yield Molecule(numbers=numbers, positions=positions)
+    except FileNotFoundError:
+        errorbye("Input file not found.")
+
+
 def read(fileObject: TextIO):
     """Method to first check the file type and then read
 
@@ -30,35 +46,89 @@ def read(fileObject: TextIO):
     The returned atom coordinates will be in Bohr
     """
 
-    # get name of file
-    fname = fileObject.name
+    return readFile(fileObject, arrays=False)
+
 
-    # initialise file type
-    filetp = "unknown"
+def readArrays(fileObject: TextIO) -> Tuple[np.ndarray, np.ndarray]:
+    """Method to first check the file type and then read the structure
+
+    directly into atomic numbers and positions (in Bohr)
+    """
+
+    return readFile(fileObject, arrays=True)
 
-    lines = fileObject.readlines()
+
+def getFileType(fname: str, head: str) -> str:
+    """Detect the file type from the file name and the head of the file."""
 
     if fname.endswith((".xyz")):
-        filetp = "xyz"
+        return "xyz"
+
+    lines = head.splitlines()
+    for line in lines:
+        if line.strip().startswith("$coord"):
+            return "turbomole"
+
+    # by convention the first thing in the xyz is the number of atoms
+    if lines and lines[0].strip().isdigit():
+        return "xyz"
+
+    return "unknown"
+
+
+def iterArrays(fileObject: TextIO) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Generator over atomic numbers and positions (in Bohr) of all frames.
+
+    XYZ files may contain several concatenated frames, which are streamed
+    one at a time. Turbomole files contain a single structure."""
+
+    fileObject, filetp = sniffFile(fileObject)
+
+    if filetp == "xyz":
+        yield from xyz.iterFrames(fileObject)
+    elif filetp == "turbomole":
+        yield tm.readArrays(fileObject)
     else:
-        for line in lines:
-            if line.strip().startswith("$coord"):
-                filetp = "turbomole"
-                break
+        errorbye("Input format erroneous or not implemented.")
 
-    fileObject.close()
 
-    atoms = []
+def sniffFile(fileObject: TextIO) -> Tuple[TextIO, str]:
+    """Detect the file type and rewind the file object for parsing.
+
+    Only the first few kilobytes are inspected for the detection."""
+
+    # get name of file
+    fname = getattr(fileObject, "name", "")
+    if not isinstance(fname, str):
+        fname = ""
+
+    head = fileObject.read(sniffSize)
+    filetp = getFileType(fname, head)
 
-    newfile = open(fname, "r+")
+    # rewind or, for streams, keep the inspected head
+    if fileObject.seekable():
+        fileObject.seek(0)
+    else:
+        fileObject = io.StringIO(head + fileObject.read())
+
+    return fileObject, filetp
+
+
+def readFile(fileObject: TextIO, arrays: bool):
+    """Detect the file type and read either Atom objects or arrays.
+
+    Only the first few kilobytes are inspected for the detection, the
+    structure is then parsed from the already opened file object."""
+
+    fileObject, filetp = sniffFile(fileObject)
+
+    atoms = []
 
     if filetp == "turbomole":
-        atoms = tm.read(newfile)
+        atoms = tm.readArrays(fileObject) if arrays else tm.read(fileObject)
     elif filetp == "xyz":
-        atoms = xyz.read(newfile)
+        atoms = xyz.readArrays(fileObject) if arrays else xyz.read(fileObject)
     else:
         errorbye("Input format erroneous or not implemented.")
 
-    newfile.close()
-
     return atoms
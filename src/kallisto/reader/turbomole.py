@@ -1,5 +1,10 @@
 # src/kallisto/reader/turbomole.py
+from typing import Tuple
+
+import numpy as np
+
 from kallisto.atom import Atom
+from kallisto.reader import getAtomicNumbers
 
 
 def read(fileObject):
@@ -12,9 +17,23 @@ def read(fileObject):
     $end
     """
 
-    lines = fileObject.readlines()
+    numbers, positions = readArrays(fileObject)
 
     atoms = []
+    for number, position in zip(numbers, positions, strict=True):
+        atom = Atom(symbol=int(number), position=position)
+        atoms.append(atom)
+
+    return atoms
+
+
+def readArrays(fileObject) -> Tuple[np.ndarray, np.ndarray]:
+    """Method to read Turbomole coord files directly into arrays.
+
+    Returns atomic numbers and positions in Bohr without creating
+    intermediate Atom objects."""
+
+    lines = fileObject.readlines()
 
     start = 0
 
@@ -23,16 +42,15 @@ def read(fileObject):
         if line.strip().startswith("$coord"):
             start = index
             break
+
+    fields = []
     for line in lines[start + 1 :]:
         # check if new section begins
         if line.startswith("$"):
             break
-        else:
-            x, y, z, symbolRaw = line.split()[:4]
-            symbolShort = symbolRaw.strip()
-            atomSymbol = symbolShort[0].upper() + symbolShort[1:].lower()
-            atomPosition = [float(x), float(y), float(z)]
-            atom = Atom(symbol=atomSymbol, position=atomPosition)
-            atoms.append(atom)
+        fields.append(line.split()[:4])
 
-    return atoms
+    numbers = getAtomicNumbers([field[3] for field in fields])
+    positions = np.array([field[:3] for field in fields], dtype=np.float64)
+
+    return numbers, positions.reshape(-1, 3)
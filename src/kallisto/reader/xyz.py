@@ -1,5 +1,10 @@
 # src/kallisto/reader/xyz.py
+from typing import Iterator, Tuple
+
+import numpy as np
+
 from kallisto.atom import Atom
+from kallisto.reader import getAtomicNumbers
 from kallisto.units import Bohr
 
 
@@ -13,20 +18,76 @@ def read(fileObject):
     <atomType x y z>
     """
 
-    lines = fileObject.readlines()
+    numbers, positions = readArrays(fileObject)
 
     atoms = []
-
-    # by convention the first thing in the xyz is the number of atoms
-    nat = int(lines[0])
-
-    # loop over the nat lines
-    for line in lines[2 : nat + 2]:
-        symbolRaw, x, y, z = line.split()[:4]
-        symbolShort = symbolRaw.strip()
-        atomSymbol = symbolShort[0].upper() + symbolShort[1:].lower()
-        atomPosition = [float(x) / Bohr, float(y) / Bohr, float(z) / Bohr]
-        atom = Atom(symbol=atomSymbol, position=atomPosition)
+    for number, position in zip(numbers, positions, strict=True):
+        atom = Atom(symbol=int(number), position=position)
         atoms.append(atom)
 
     return atoms
+
+
+def readArrays(fileObject) -> Tuple[np.ndarray, np.ndarray]:
+    """Method to read XYZ files directly into arrays.
+
+    Returns atomic numbers and positions in Bohr without creating
+    intermediate Atom objects. Only the first frame is read."""
+
+    try:
+        return next(iterFrames(fileObject))
+    except StopIteration:
+        # an empty file has no line with the number of atoms
+        raise IndexError("No structure found in xyz file.") from None
+
+
+def iterFrames(fileObject) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Generator over all frames of a (multi-frame) XYZ file.
+
+    Frames are read one at a time such that trajectories are processed in
+    constant memory. Yields atomic numbers and positions in Bohr, where
+    consecutive frames with the same atom types share one numbers array."""
+
+    symbols = None
+    numbers = np.zeros(shape=(0,), dtype=int)
+
+    while True:
+        line = fileObject.readline()
+        if not line:
+            return
+        if not line.strip():
+            continue
+
+        # by convention the first thing in the xyz is the number of atoms
+        nat = int(line)
+        fileObject.readline()
+
+        fields = [fileObject.readline().split()[:4] for _ in range(nat)]
+        frameSymbols = [field[0] for field in fields]
+        if frameSymbols != symbols:
+            symbols = frameSymbols
+            numbers = getAtomicNumbers(symbols)
+        positions = np.array([field[1:4] for field in fields], dtype=np.float64)
+
+        yield numbers, positions.reshape(-1, 3) / Bohr
+
+
+def writeFrames(fileObject, numbers: np.ndarray, positions: np.ndarray, comments=None):
+    """Append frames with positions (nframes, nat, 3) in Bohr to a
+    (multi-frame) XYZ file.
+
+    The line template of a frame is built once and filled with all
+    coordinates of a frame in a single formatting call."""
+
+    from kallisto.data import chemical_symbols
+
+    nat = len(numbers)
+    body = "".join(
+        "{:3} %14.8f %14.8f %14.8f\n".format(chemical_symbols[number])
+        for number in numbers
+    )
+
+    for k, frame in enumerate(positions):
+        comment = "Created with kallisto" if comments is None else comments[k]
+        fileObject.write("{}\n{}\n".format(nat, comment))
+        fileObject.write(body % tuple((frame * Bohr).ravel()))
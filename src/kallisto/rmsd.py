@@ -1,9 +1,8 @@
 # src/kallisto/rmsd.py
 from collections import Counter
-from typing import Tuple
+from typing import Iterator, Tuple
 
 import numpy as np
-from scipy.sparse.linalg import eigsh
 from scipy.spatial import distance
 from scipy.spatial.transform import Rotation as R
 
@@ -16,142 +15,468 @@ def rmsd(n: int, coord1: np.ndarray, coord2: np.ndarray) -> Tuple[float, np.ndar
     coordinate sets coord1(n,3) and coord2(n,3) using a method based on
     quaternions."""
 
+    errors, u = rmsdBatch(coord1[np.newaxis, 0:n, :], coord2[np.newaxis, 0:n, :])
+
+    return errors, u[0]
+
+
+def rmsdBatch(
+    coords1: np.ndarray, coords2: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculate least square rmsds in Angstrom and rotation matrices for
+    stacks of coordinate pairs coords1(B,n,3) and coords2(B,n,3) (in Bohr).
+
+    Returns rmsds of shape (B,) and rotation matrices of shape (B,3,3)."""
+
+    x, xNorm = getCenteredCoordinates(coords1)
+    y, yNorm = getCenteredCoordinates(coords2)
+
+    return rmsdFromCentered(x, y, xNorm, yNorm)
+
+
+def getCenteredCoordinates(coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Centroidal coordinates in Angstrom and their squared norms for
+    coordinates of shape (..., n, 3) in Bohr."""
+
     from kallisto.units import Bohr
 
-    # copy original coordinates
-    x = np.zeros(shape=(n, 3), dtype=np.float64)
-    y = np.zeros(shape=(n, 3), dtype=np.float64)
-
-    x[0:n, :] = coord1[0:n, :]
-    y[0:n, :] = coord2[0:n, :]
-
-    # calculate the barycenters, centroidal coordinates, and the norms
-    x_norm = 0.0
-    y_norm = 0.0
-    x_center = np.zeros(shape=(3,), dtype=np.float64)
-    y_center = np.zeros(shape=(3,), dtype=np.float64)
-    xi = np.zeros(shape=(n,), dtype=np.float64)
-    yi = np.zeros(shape=(n,), dtype=np.float64)
-
-    for i in range(3):
-        for j in range(n):
-            xi[j] = x[j, i] * Bohr
-            yi[j] = y[j, i] * Bohr
-        x_center[i] = np.sum(xi) / float(n)
-        y_center[i] = np.sum(yi) / float(n)
-        xi[:] = xi[:] - x_center[i]
-        yi[:] = yi[:] - y_center[i]
-        x[:, i] = xi[:]
-        y[:, i] = yi[:]
-        x_norm += np.dot(xi, xi)
-        y_norm += np.dot(yi, yi)
-
-    # calculate the R matrix
-    rmat = np.zeros(shape=(3, 3), dtype=np.float64)
-    for i in range(3):
-        for j in range(3):
-            rmat[i, j] = np.dot(x[:, i], y[:, j])
-
-    # calculate the S matrix (quaternions)
-    # use fac = -1 instead of u.T below
-    fac = -1
-    smat = np.zeros(shape=(4, 4), dtype=np.float64)
-    smat[0, 0] = rmat[0, 0] + rmat[1, 1] + rmat[2, 2]
-    smat[1, 0] = fac * (rmat[1, 2] - rmat[2, 1])
-    smat[2, 0] = fac * (rmat[2, 0] - rmat[0, 2])
-    smat[3, 0] = fac * (rmat[0, 1] - rmat[1, 0])
-
-    smat[0, 1] = smat[1, 0]
-    smat[1, 1] = rmat[0, 0] - rmat[1, 1] - rmat[2, 2]
-    smat[2, 1] = rmat[0, 1] + rmat[1, 0]
-    smat[3, 1] = rmat[0, 2] + rmat[2, 0]
-
-    smat[0, 2] = smat[2, 0]
-    smat[1, 2] = smat[2, 1]
-    smat[2, 2] = -rmat[0, 0] + rmat[1, 1] - rmat[2, 2]
-    smat[3, 2] = rmat[1, 2] + rmat[2, 1]
-
-    smat[0, 3] = smat[3, 0]
-    smat[1, 3] = smat[3, 1]
-    smat[2, 3] = smat[3, 2]
-    smat[3, 3] = -rmat[0, 0] - rmat[1, 1] + rmat[2, 2]
-
-    # calculate largest eigenvalue and eigenvector
-    eigenval, eigenvec = eigsh(smat, 1, which="LA")
-    eigenvec = eigenvec.squeeze()
+    x = np.asarray(coords, dtype=np.float64) * Bohr
+    x = x - np.mean(x, axis=-2, keepdims=True)
+
+    return x, np.einsum("...ij,...ij->...", x, x)
+
+
+def rmsdFromCentered(
+    x: np.ndarray, y: np.ndarray, xNorm: np.ndarray, yNorm: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Quaternion-based rmsds and rotation matrices of already centered
+    coordinate stacks x and y of shape (..., n, 3) with squared norms.
+
+    All R and S matrices are set up at once and the largest eigenpairs of
+    the symmetric 4x4 S matrices are obtained from one batched eigh call."""
+
+    n = x.shape[-2]
+
+    # calculate the R matrices
+    rmat = np.einsum("...ki,...kj->...ij", x, y)
+
+    # calculate the S matrices (quaternions)
+    smat = getQuaternionMatrices(rmat)
+
+    # calculate largest eigenvalues and eigenvectors (ascending order)
+    eigenval, eigenvec = np.linalg.eigh(smat)
+    eigenval = eigenval[..., -1]
+    eigenvec = eigenvec[..., :, -1]
 
     # convert quaternion eigenvec to rotation matrix U
     u = rotationMatrix(eigenvec)
 
     # root mean squared deviation
-    error = np.sqrt(np.maximum(0.0, ((x_norm + y_norm) - 2 * eigenval) / float(n)))
+    error = np.sqrt(np.maximum(0.0, ((xNorm + yNorm) - 2 * eigenval) / float(n)))
 
     return error, u
 
 
+def getQuaternionMatrices(rmat: np.ndarray) -> np.ndarray:
+    """Symmetric quaternion S matrices (..., 4, 4) from R matrices (..., 3, 3)."""
+
+    # use fac = -1 instead of u.T below
+    fac = -1
+    r = [[rmat[..., i, j] for j in range(3)] for i in range(3)]
+
+    smat = np.zeros(shape=rmat.shape[:-2] + (4, 4), dtype=np.float64)
+    smat[..., 0, 0] = r[0][0] + r[1][1] + r[2][2]
+    smat[..., 1, 0] = fac * (r[1][2] - r[2][1])
+    smat[..., 2, 0] = fac * (r[2][0] - r[0][2])
+    smat[..., 3, 0] = fac * (r[0][1] - r[1][0])
+
+    smat[..., 1, 1] = r[0][0] - r[1][1] - r[2][2]
+    smat[..., 2, 1] = r[0][1] + r[1][0]
+    smat[..., 3, 1] = r[0][2] + r[2][0]
+
+    smat[..., 2, 2] = -r[0][0] + r[1][1] - r[2][2]
+    smat[..., 3, 2] = r[1][2] + r[2][1]
+
+    smat[..., 3, 3] = -r[0][0] - r[1][1] + r[2][2]
+
+    # symmetrize upper triangle
+    upper = np.triu_indices(4, k=1)
+    smat[..., upper[0], upper[1]] = smat[..., upper[1], upper[0]]
+
+    return smat
+
+
 def rotationMatrix(q: np.ndarray) -> np.ndarray:
-    """Constructs rotation matrix U from quaternion q."""
+    """Constructs rotation matrix U from quaternion q.
+
+    Stacks of quaternions (..., 4) give stacks of matrices (..., 3, 3)."""
 
-    q = q.squeeze()
-    u = R.from_quat(q).as_matrix()
+    q = np.asarray(q, dtype=np.float64)
+    if q.ndim > 1 and q.shape[-1] != 4:
+        q = q.squeeze()
+    shape = q.shape[:-1]
+    u = R.from_quat(q.reshape(-1, 4)).as_matrix()
 
     # anti-transpose, transpose, and fix signs
-    u = u[::-1, ::-1].T
-    u[0, 0] *= -1
-    u[1, 1] *= -1
-    u[1, 2] *= -1
-    u[2, 0] *= -1
+    u = np.swapaxes(u[:, ::-1, ::-1], -1, -2).copy()
+    u[:, 0, 0] *= -1
+    u[:, 1, 1] *= -1
+    u[:, 1, 2] *= -1
+    u[:, 2, 0] *= -1
 
-    return u
+    return u.reshape(shape + (3, 3))
 
 
-def recursiveGetSubstructures(n: int, bonds, center: int):
-    """Recursively call getSubstructures to get all covalent substructres of center atom."""
+# Centered coordinates and norms shared with the worker processes
+rmsdWorkerData: dict = {}
 
-    paths = []
 
-    for i in range(len(bonds[center])):
-        path = np.zeros(shape=(n,), dtype=np.int32)
-        path.fill(-1)
-        partner = bonds[center][i]
-        count = Counter()  # type: ignore
-        count["step"] = -1
-        getSubstructures(n, bonds, center, partner, path, count=count)
-        # get rid of -1 elements in path
-        path = [x for x in path if x != -1]
-        paths.append(path)
+def getCondensedPairs(n: int, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pair indices (i, j) with i < j of the entries start to stop of a
+    condensed distance matrix of n items (same order as scipy's pdist)."""
 
-    return paths
+    k = np.arange(start, stop, dtype=np.int64)
+    rows = np.arange(n, dtype=np.int64)
+    # index of the first entry of every row
+    first = rows * (2 * n - rows - 1) // 2
+    i = np.searchsorted(first, k, side="right") - 1
+    j = k - first[i] + i + 1
 
+    return i, j
 
-def getSubstructures(
-    n: int,
-    bonds: np.ndarray,
-    center: int,
-    partner: int,
-    path: np.ndarray,
-    count: Counter,
-):
-    """Recursively determine all atoms that belong to the ligands of center atom."""
 
-    # partner atom matches center
-    if center == partner:
-        return
-    # actual atom is already in path
-    if partner in path:
-        return
-    # count is larger than number of atoms
-    if (count["step"] + 1) > (n - 1):
-        return
+def rmsdCondensed(
+    x: np.ndarray, norms: np.ndarray, start: int, stop: int
+) -> np.ndarray:
+    """Rmsds in Angstrom of the entries start to stop of the condensed
+    rmsd matrix of centered coordinates x (nconf, nat, 3) with norms."""
+
+    i, j = getCondensedPairs(len(x), start, stop)
+    errors, _ = rmsdFromCentered(x[i], x[j], norms[i], norms[j])
+
+    return errors
+
+
+def initRMSDWorker(x: np.ndarray, norms: np.ndarray):
+    """Store centered coordinates once per worker process."""
+
+    rmsdWorkerData["x"] = x
+    rmsdWorkerData["norms"] = norms
+
+
+def rmsdCondensedWorker(bounds: Tuple[int, int]) -> np.ndarray:
+    """Worker evaluating one chunk of the condensed rmsd matrix."""
+
+    return rmsdCondensed(rmsdWorkerData["x"], rmsdWorkerData["norms"], *bounds)
+
+
+def rmsdMatrix(
+    coords: np.ndarray, out=None, jobs: int = 1, chunk: int = 4096
+) -> np.ndarray:
+    """Calculate all pairwise least square rmsds in Angstrom of a stack of
+    conformers coords(nconf, n, 3) (in Bohr).
+
+    Returns the condensed matrix of length nconf·(nconf - 1)/2 in the order
+    of scipy's pdist (use scipy.spatial.distance.squareform for the square
+    matrix). Conformers are centered once, the pairs are evaluated in
+    vectorized chunks, optionally on a process pool with jobs workers. If
+    out is a file name, the matrix is written to a memory-mapped .npy file,
+    such that it may be larger than the available memory."""
+
+    x, norms = getCenteredCoordinates(coords)
+    nconf = len(x)
+    npairs = nconf * (nconf - 1) // 2
+
+    if out is None:
+        matrix = np.zeros(shape=(npairs,), dtype=np.float64)
+    else:
+        matrix = np.lib.format.open_memmap(
+            out, mode="w+", dtype=np.float64, shape=(npairs,)
+        )
+
+    bounds = [(k, min(k + chunk, npairs)) for k in range(0, npairs, chunk)]
+
+    if jobs <= 1:
+        for start, stop in bounds:
+            matrix[start:stop] = rmsdCondensed(x, norms, start, stop)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=initRMSDWorker, initargs=(x, norms)
+        ) as executor:
+            results = executor.map(rmsdCondensedWorker, bounds)
+            for (start, stop), errors in zip(bounds, results, strict=True):
+                matrix[start:stop] = errors
+
+    if out is not None:
+        matrix.flush()
+
+    return matrix
+
+
+def alignFrames(reference: np.ndarray, frames: np.ndarray) -> np.ndarray:
+    """Superimpose frames (nframes, n, 3) onto reference (n, 3) in place.
+
+    Frames are moved to the centroid of the reference and rotated with
+    the optimal rotation matrices, obtained for all frames at once.
+    Returns the rmsds in Angstrom of shape (nframes,)."""
+
+    from kallisto.units import Bohr
+
+    centroid = np.mean(reference, axis=0)
+    frames -= np.mean(frames, axis=1, keepdims=True)
+
+    x = (reference - centroid) * Bohr
+    y = frames * Bohr
+    xNorm = np.einsum("ij,ij->", x, x)
+    yNorm = np.einsum("...ij,...ij->...", y, y)
+    errors, u = rmsdFromCentered(np.broadcast_to(x, y.shape), y, xNorm, yNorm)
+
+    # x·u is superimposed onto y, i.e., y·uᵀ onto x
+    frames[:] = np.matmul(frames, np.swapaxes(u, -1, -2))
+    frames += centroid
+
+    return errors
+
+
+def alignTrajectory(
+    reference: Molecule, frames, chunk: int = 1024
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Generator superimposing a stream of frames onto a reference.
+
+    frames yields atomic numbers and positions in Bohr (see iterArrays).
+    Frames are collected into chunks that are aligned at once; yields the
+    aligned positions (nchunk, n, 3) and rmsds in Angstrom of each chunk.
+    Every chunk gets a fresh array that is owned by the caller."""
+
+    numbers = reference.get_atomic_numbers()
+    positions = reference.get_positions()
+    nat = len(numbers)
+
+    buffer = np.empty(shape=(chunk, nat, 3), dtype=np.float64)
+    count = 0
+    for at, xyz in frames:
+        if not np.array_equal(at, numbers):
+            raise ValueError("Frames differ from the reference atoms.")
+        buffer[count] = xyz
+        count += 1
+        if count == chunk:
+            errors = alignFrames(positions, buffer)
+            yield buffer, errors
+            buffer = np.empty(shape=(chunk, nat, 3), dtype=np.float64)
+            count = 0
+
+    if count > 0:
+        aligned = buffer[:count]
+        errors = alignFrames(positions, aligned)
+        yield aligned, errors
+
+
+def getAtomSignatures(numbers: np.ndarray, bonds) -> list:
+    """Atom signatures (element, sorted elements of bonding partners)."""
+
+    numbers = np.asarray(numbers)
+    return [
+        (int(numbers[i]), tuple(sorted(numbers[partners].tolist())))
+        for i, partners in enumerate(bonds)
+    ]
+
+
+def getAssignmentClasses(
+    numbers1: np.ndarray, numbers2: np.ndarray, bonds1=None, bonds2=None
+) -> list:
+    """Classes of atoms that may be mapped onto each other.
+
+    Returns a list of index pairs (indices1, indices2). Atoms are grouped by
+    their element and, if bonding partners (see get_bonds) are given and
+    compatible, by their bonded-neighbor signature as well."""
+
+    numbers1 = np.asarray(numbers1)
+    numbers2 = np.asarray(numbers2)
+
+    if Counter(numbers1.tolist()) != Counter(numbers2.tolist()):
+        raise ValueError("Structures differ in their elemental composition.")
+
+    keys1, keys2 = numbers1.tolist(), numbers2.tolist()
+    if bonds1 is not None and bonds2 is not None:
+        signatures1 = getAtomSignatures(numbers1, bonds1)
+        signatures2 = getAtomSignatures(numbers2, bonds2)
+        # different bonding situations: fall back to element classes
+        if Counter(signatures1) == Counter(signatures2):
+            keys1, keys2 = signatures1, signatures2
+
+    classes = []
+    for key in sorted(set(keys1)):
+        indices1 = np.array([i for i, k in enumerate(keys1) if k == key], dtype=int)
+        indices2 = np.array([i for i, k in enumerate(keys2) if k == key], dtype=int)
+        classes.append((indices1, indices2))
+
+    return classes
+
+
+def getOptimalAssignment(x: np.ndarray, y: np.ndarray, classes: list) -> np.ndarray:
+    """Assignment perm minimizing Σ|x[i] - y[perm[i]]|² within each class
+    (Hungarian algorithm)."""
+
+    from scipy.optimize import linear_sum_assignment
+
+    perm = np.zeros(shape=(len(x),), dtype=int)
+    for indices1, indices2 in classes:
+        if len(indices1) == 1:
+            perm[indices1] = indices2
+            continue
+        cost = distance.cdist(x[indices1], y[indices2], "sqeuclidean")
+        rows, cols = linear_sum_assignment(cost)
+        perm[indices1[rows]] = indices2[cols]
+
+    return perm
+
+
+def getPrincipalAxesRotations(x: np.ndarray, y: np.ndarray) -> list:
+    """Proper rotations that map the principal axes of centered coordinates
+    y onto the ones of x (four choices of axis directions)."""
+
+    _, axes1 = np.linalg.eigh(x.T @ x)
+    _, axes2 = np.linalg.eigh(y.T @ y)
+
+    rotations = []
+    for signs in ((1, 1, 1), (1, -1, -1), (-1, 1, -1), (-1, -1, 1)):
+        rotation = axes2 @ np.diag(signs) @ axes1.T
+        if np.linalg.det(rotation) < 0:
+            rotation = -rotation
+        rotations.append(rotation)
+
+    return rotations
+
+
+def rmsdReorder(
+    mol1: Molecule, mol2: Molecule, bonds: bool = True, maxiter: int = 100
+) -> Tuple[float, np.ndarray, np.ndarray]:
+    """Calculate the least square rmsd in Angstrom between two structures
+    with different atom ordering.
+
+    The atom assignment is solved with the Hungarian algorithm within each
+    element class (refined by bonded-neighbor signatures if bonds is True)
+    and alternated with the quaternion alignment until the assignment does
+    not change anymore. The alternation starts from the given orientation
+    and from all principal axes alignments; the best result is kept. If
+    both structures have the same element order, the given ordering is a
+    candidate as well. Each step costs O(n³) instead of enumerating
+    permutations.
+
+    Returns the rmsd, the rotation matrix u, and the assignment perm such
+    that rmsd(n, coord1, coord2[perm]) gives the same rmsd and u."""
+
+    if maxiter < 1:
+        raise ValueError("Number of iterations must be at least 1.")
+
+    nat = mol1.get_number_of_atoms()
+    if nat != mol2.get_number_of_atoms():
+        raise ValueError("Number of atoms do not match.")
+
+    bonds1, bonds2 = None, None
+    if bonds:
+        bonds1, bonds2 = mol1.get_bonds(), mol2.get_bonds()
+    classes = getAssignmentClasses(
+        mol1.get_atomic_numbers(), mol2.get_atomic_numbers(), bonds1, bonds2
+    )
+
+    x, xNorm = getCenteredCoordinates(mol1.get_positions())
+    y, yNorm = getCenteredCoordinates(mol2.get_positions())
+
+    best = (np.inf, np.eye(3), np.arange(nat))
+    if np.array_equal(mol1.get_atomic_numbers(), mol2.get_atomic_numbers()):
+        errors, u = rmsdFromCentered(x, y, xNorm, yNorm)
+        best = (float(errors), u, np.arange(nat))
+
+    starts = [np.eye(3)] + getPrincipalAxesRotations(x, y)
+    for rotation in starts:
+        aligned = y @ rotation
+        perm = None
+        for _ in range(maxiter):
+            previous = perm
+            perm = getOptimalAssignment(x, aligned, classes)
+            if previous is not None and np.array_equal(perm, previous):
+                break
+            errors, u = rmsdFromCentered(x, y[perm], xNorm, yNorm)
+            # x·u is superimposed onto y[perm], i.e., y·uᵀ onto x
+            aligned = y @ u.T
+        if errors < best[0]:
+            best = (float(errors), u, perm)
+
+    return best
+
+
+def getBondGraph(n: int, bonds, removed=()):
+    """Sparse adjacency matrix of the covalent bonds (see get_bonds) without
+    the bonds of the removed atoms (neighbors are sorted by index)."""
+
+    from scipy import sparse
+
+    counts = np.array([len(partners) for partners in bonds], dtype=int)
+    rows = np.repeat(np.arange(n), counts)
+    cols = np.array([p for partners in bonds for p in partners], dtype=int)
+
+    keep = ~(np.isin(rows, removed) | np.isin(cols, removed))
+    data = np.ones(shape=(np.count_nonzero(keep),), dtype=np.int8)
+
+    return sparse.csr_matrix((data, (rows[keep], cols[keep])), shape=(n, n))
+
+
+def getLigands(n: int, bonds, centers) -> list:
+    """Get all covalent substructures (ligands) of one or more center atoms.
+
+    All centers are removed from the bond graph at once and the remaining
+    atoms are labelled by their connected components. Each component bound
+    to a center is listed once in depth-first preorder, starting at the
+    first bonding partner of the center that belongs to it, such that a
+    chelating ligand appears only once. A preorder is computed once per
+    binding atom that starts a ligand, which is O(N + E) overall unless
+    ligands bridge several centers. Returns one list of substructures per
+    center, ordered like the bonding partners of the center."""
+
+    from scipy.sparse.csgraph import connected_components, depth_first_order
+
+    centers = np.atleast_1d(np.asarray(centers, dtype=int))
+    graph = getBondGraph(n, bonds, centers)
+    _, labels = connected_components(graph, directed=False)
+
+    orders: dict = {}
+    ligands = []
+    for center in centers:
+        substructures, seen = [], set()
+        for partner in bonds[center]:
+            if labels[partner] in seen:
+                continue
+            seen.add(labels[partner])
+            if partner not in orders:
+                orders[partner] = depth_first_order(
+                    graph, partner, directed=True, return_predecessors=False
+                ).tolist()
+            substructures.append(list(orders[partner]))
+        ligands.append(substructures)
+
+    return ligands
+
+
+def recursiveGetSubstructures(n: int, bonds, center: int):
+    """Get all covalent substructres of center atom.
+
+    The center is removed from the bond graph and every bonding partner is
+    expanded to its connected component in depth-first preorder, without
+    recursion. Returns one substructure per bonding partner."""
+
+    from scipy.sparse.csgraph import depth_first_order
 
-    count["step"] += 1
-    path[count["step"]] = partner
+    graph = getBondGraph(n, bonds, [center])
 
-    if len(bonds[partner]) > 1:
-        for i in range(len(bonds[partner])):
-            p = bonds[partner][i]
-            # enter recursive call
-            getSubstructures(n, bonds, center, p, path, count=count)
+    return [
+        depth_first_order(
+            graph, partner, directed=True, return_predecessors=False
+        ).tolist()
+        for partner in bonds[center]
+    ]
 
 
 def exchangeSubstructure(
@@ -181,18 +506,11 @@ def exchangeSubstructure(
     centralAtom = refxyz[center, :]
 
     mol = Molecule()
+    substructures = recursiveGetSubstructures(n, bonds, center)
     for i in range(len(bonds[center])):
         if i == subnr:
-            path = np.zeros(shape=(n,), dtype=np.int32)
-            # set all elements to -1
-            path.fill(-1)
-            partner = bonds[center][i]
-            count = Counter()  # type: ignore
-            count["step"] = -1
-            getSubstructures(n, bonds, center, partner, path, count=count)
-            # get rid of -1 elements
-            path = [x for x in path if x != -1]
-            path = np.array(path)
+            path = np.array(substructures[i])
+            excluded = set(substructures[i])
             # create molecule from given path
             oldsub = getSubstructureFromPath(ref, path)
             # get all bonding partner
@@ -209,7 +527,7 @@ def exchangeSubstructure(
             # atoms from complex excluding old substrate
             atoms = []
             for j in range(refnat):
-                if j in path:
+                if j in excluded:
                     continue
                 atom = Atom(symbol=refat[j], position=refxyz[j, :])
                 atoms.append(atom)
@@ -19,8 +19,8 @@ def getClassicalSterimol(mol: Molecule, origin: int, partner: int):
     # get van der Waals radii in Bohr
     vdw = mol.get_vdw(charge=0, vdwtype="rahm", scale=1)
 
-    # shift all atoms wrt origin
-    coords -= coords[origin]
+    # shift all atoms wrt origin (keep positions of molecule untouched)
+    coords = coords - coords[origin]
 
     # extract vector origin -> attachted and normalize
     vector = coords[partner] - coords[origin]
@@ -2,13 +2,19 @@
 import numpy as np
 
 
-def zeta(a: float, c: float, qref: float, q: float) -> float:
-    """Charge scaling function for polarizabilities."""
+def zeta(a: float, c: float, qref: float, q: float) -> np.ndarray:
+    """Charge scaling function for polarizabilities.
 
-    if q <= 0:
-        zeta = np.exp(a)
-    else:
-        zeta = np.exp(a * (1.0 - np.exp(c * (1.0 - qref / q))))
+    Works on scalars as well as on arrays of charges."""
+
+    q = np.asarray(q, dtype=np.float64)
+    safe = np.where(q > 0, q, 1.0)
+
+    zeta = np.where(
+        q > 0,
+        np.exp(a * (1.0 - np.exp(c * (1.0 - qref / safe)))),
+        np.exp(a),
+    )
 
     return zeta
 
@@ -471,3 +471,26 @@ def propanolIntermediate():
     for i, _ in enumerate(coords):
         atoms.append(Atom(symbols[i], position=coords[i]))
     return Molecule(symbols=atoms)
+
+
+def tiledPyridine(shape, spacing):
+    """Create copies of pyridine on a grid of shape (a, b, c) with the given
+    spacing (in Bohr) and return as Molecule."""
+    import numpy as np
+
+    mol = pyridine()
+    grid = np.indices(shape).reshape(3, -1).T
+    shifts = spacing * grid
+    positions = mol.get_positions()[np.newaxis] + shifts[:, np.newaxis]
+    return Molecule(
+        numbers=np.tile(mol.get_atomic_numbers(), len(grid)),
+        positions=positions.reshape(-1, 3),
+    )
+
+
+def randomRotation(rng):
+    """Draw a random proper rotation matrix (det = +1) from rng."""
+    import numpy as np
+
+    q, _ = np.linalg.qr(rng.normal(size=(3, 3)))
+    return q * np.linalg.det(q)
@@ -25,3 +25,46 @@ def test_alp_anion():
     alp = mol.get_alp(charge)
     assert np.isclose(alp[0], 9.42323948)
     assert np.isclose(alp[1], 3.25063226)
+
+
+def test_alp_vectorized_matches_loops():
+    from kallisto.methods import getPolarizabilities
+    from kallisto.methods import getReferenceTables
+    from tests.store import iridiumCatalyst
+
+    mol = iridiumCatalyst()
+    at = mol.get_atomic_numbers()
+    covcn = mol.get_cns(cntype="cov")
+    for charge in (-1, 0, 1):
+        qs = mol.get_eeq(charge)
+        want = getPolarizabilities(at, covcn, qs, charge, vectorized=False)
+        got = getPolarizabilities(at, covcn, qs, charge)
+        assert np.allclose(got, want)
+    assert getReferenceTables() is getReferenceTables()
+    assert not getReferenceTables()[0].flags.writeable
+
+
+def test_alp_dynamic():
+    mol = ch_radical()
+    alpiw = mol.get_alp(0, dynamic=True)
+    assert alpiw.shape == (2, 23)
+    assert alpiw.flags.c_contiguous
+    assert np.allclose(alpiw[:, 0], [6.56554674, 1.75193793])
+    assert np.all(np.diff(alpiw, axis=1) <= 0.0)
+
+
+def test_c6_coefficients():
+    from kallisto.methods import getC6Coefficients
+    from tests.store import pyridine
+
+    mol = pyridine()
+    c6 = mol.get_c6(0)
+    assert c6.shape == (11, 11)
+    assert np.allclose(c6, c6.T)
+    assert np.isclose(np.sum(c6), mol.get_molecular_c6(0))
+    i, j, sparse = mol.get_c6(0, threshold=25.0)
+    assert np.all(i < j)
+    assert np.allclose(sparse, c6[i, j])
+    alpiw = mol.get_alp(0, dynamic=True)
+    stacked = getC6Coefficients(np.stack((alpiw, alpiw)))
+    assert np.allclose(stacked[1], c6)
@@ -2,6 +2,7 @@
 import os
 
 import click.testing
+import numpy as np
 import pytest
 
 from kallisto.console import cli
@@ -131,6 +132,22 @@ def test_cli_eeq_anion(runner, pyridine_xyz):
     assert result.exit_code == 0
 
 
+def test_cli_eeq_cg(runner, pyridine_xyz):
+    direct = runner.invoke(cli, ["eeq", pyridine_xyz])
+    result = runner.invoke(
+        cli, ["eeq", "--solver", "cg", "--tol", "1e-10", pyridine_xyz]
+    )
+    assert result.exit_code == 0
+    got = np.array(result.output.split(), dtype=float)
+    want = np.array(direct.output.split(), dtype=float)
+    assert np.allclose(got, want, atol=1e-8)
+
+
+def test_cli_eeq_invalid_solver(runner, pyridine_xyz):
+    result = runner.invoke(cli, ["eeq", "--solver", "lu", pyridine_xyz])
+    assert result.exit_code == 1
+
+
 # test cli part for alp
 def test_cli_alp_silent(runner, pyridine_xyz):
     result = runner.invoke(cli, ["--silent", "alp", pyridine_xyz])
@@ -219,6 +236,60 @@ def test_cli_rms(runner, ch_radical_xyz):
     assert result.exit_code == 0
 
 
+def test_cli_rms_reorder(runner, pyridine_xyz):
+    result = runner.invoke(cli, ["rms", "--reorder", pyridine_xyz, pyridine_xyz])
+    assert result.exit_code == 0
+    assert result.output.splitlines()[-1].split() == [str(i) for i in range(11)]
+
+
+def test_cli_rmsmat(runner, tmpdir, pyridine_xyz, ch_radical_xyz):
+    fn = os.path.join(str(tmpdir), "trajectory.xyz")
+    with open(pyridine_xyz) as f:
+        frame = f.read()
+    with open(fn, "w") as f:
+        f.write(frame * 3)
+    matrix = os.path.join(str(tmpdir), "rmsd.npy")
+    result = runner.invoke(cli, ["rmsmat", "--matrix", matrix, fn])
+    assert result.exit_code == 0
+    assert np.allclose(np.load(matrix), np.zeros(3), atol=1e-6)
+    with open(fn, "a") as f, open(ch_radical_xyz) as g:
+        f.write(g.read())
+    result = runner.invoke(cli, ["rmsmat", "--matrix", matrix, fn])
+    assert result.exit_code == 1
+
+
+def test_cli_cluster(runner, tmpdir, pyridine_xyz):
+    fn = os.path.join(str(tmpdir), "trajectory.xyz")
+    with open(pyridine_xyz) as f:
+        frame = f.read()
+    with open(fn, "w") as f:
+        f.write(frame * 3)
+    result = runner.invoke(cli, ["cluster", fn])
+    assert result.exit_code == 0
+    assert result.output.split() == ["0", "1", "2"]
+    result = runner.invoke(cli, ["cluster", "missing.xyz"])
+    assert result.exit_code == 1
+
+
+def test_cli_align(runner, tmpdir, pyridine_xyz, ch_radical_xyz):
+    fn = os.path.join(str(tmpdir), "trajectory.xyz")
+    with open(pyridine_xyz) as f:
+        frame = f.read()
+    with open(fn, "w") as f:
+        f.write(frame * 3)
+    aligned = os.path.join(str(tmpdir), "aligned.xyz")
+    args = ["align", "--ref", pyridine_xyz, "--aligned", aligned, "--chunk", "2"]
+    result = runner.invoke(cli, args + [fn])
+    assert result.exit_code == 0
+    assert np.allclose([float(v) for v in result.output.split()], 0.0, atol=1e-6)
+    result = runner.invoke(cli, ["rmsmat", "--matrix", aligned + ".npy", aligned])
+    assert result.exit_code == 0
+    assert np.allclose(np.load(aligned + ".npy"), 0.0, atol=1e-6)
+    args = ["align", "--ref", ch_radical_xyz, "--aligned", aligned]
+    result = runner.invoke(cli, args + [fn])
+    assert result.exit_code == 1
+
+
 # test cli part for lig
 def test_cli_lig_silent(runner, ch_radical_xyz):
     result = runner.invoke(cli, ["--silent", "lig", "--center", "1", ch_radical_xyz])
@@ -230,6 +301,14 @@ def test_cli_lig_0(runner, ch_radical_xyz):
     assert result.exit_code == 0
 
 
+def test_cli_lig_centers(runner, ch_radical_xyz):
+    result = runner.invoke(
+        cli, ["lig", "--center", "0", "--center", "1", ch_radical_xyz]
+    )
+    assert result.exit_code == 0
+    assert result.output.count("Write out substructures") == 2
+
+
 # test cli part for exs
 def test_cli_exs_silent(runner, pyridine_xyz):
     result = runner.invoke(
@@ -333,3 +412,119 @@ def test_cli_prox(runner, pyridine_xyz):
 def test_cli_prox_invalid_size(runner, pyridine_xyz):
     result = runner.invoke(cli, ["prox", "--size", "3", "2", pyridine_xyz])
     assert result.exit_code == 1
+
+
+def test_cli_alp_frequencies(runner, pyridine_xyz):
+    static = runner.invoke(cli, ["alp", pyridine_xyz])
+    result = runner.invoke(cli, ["alp", "--frequencies", pyridine_xyz])
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert len(lines) == 11
+    assert all(len(line.split()) == 23 for line in lines)
+    want = np.array(static.output.split(), dtype=float)
+    got = np.array([line.split()[0] for line in lines], dtype=float)
+    assert np.allclose(got, want)
+    result = runner.invoke(cli, ["alp", "--frequencies", "--molecular", pyridine_xyz])
+    assert len(result.output.split()) == 23
+
+
+def test_cli_c6(runner, pyridine_xyz):
+    result = runner.invoke(cli, ["c6", pyridine_xyz])
+    assert result.exit_code == 0
+    assert len(result.output.split()) == 11
+    result = runner.invoke(cli, ["c6", "--molecular", pyridine_xyz])
+    assert result.exit_code == 0
+    assert np.isclose(float(result.output), 1567.25234054)
+
+
+def test_cli_disp(runner, pyridine_xyz):
+    result = runner.invoke(cli, ["disp", pyridine_xyz])
+    assert result.exit_code == 0
+    atomic = np.array(result.output.split(), dtype=float)
+    assert len(atomic) == 11
+    result = runner.invoke(cli, ["disp", "--molecular", pyridine_xyz])
+    assert np.isclose(float(result.output), np.sum(atomic))
+
+
+# test cli part for multi-frame xyz files
+def test_cli_frames(runner, tmpdir, pyridine_xyz):
+    fn = os.path.join(str(tmpdir), "trajectory.xyz")
+    with open(pyridine_xyz) as f:
+        frame = f.read()
+    with open(fn, "w") as f:
+        f.write(frame * 3)
+    single = runner.invoke(cli, ["cns", pyridine_xyz])
+    result = runner.invoke(cli, ["cns", "--frames", fn])
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert len(lines) == 3
+    assert [float(v) for v in lines[2].split()] == [
+        float(v) for v in single.output.split()
+    ]
+    result = runner.invoke(cli, ["eeq", "--frames", fn])
+    assert result.exit_code == 0
+    assert len(result.output.splitlines()[0].split()) == 11
+    result = runner.invoke(cli, ["alp", "--frames", "--molecular", fn])
+    assert result.exit_code == 0
+    assert len(result.output.split()) == 3
+
+
+# test cli part for batch
+def test_cli_batch(runner, tmpdir):
+    from tests.store import ch_radical
+    from tests.store import pyridine
+
+    pyridine().writeMolecule(name="a.xyz", path=str(tmpdir))
+    ch_radical().writeMolecule(name="b.xyz", path=str(tmpdir))
+    with open(os.path.join(str(tmpdir), "c.xyz"), "w") as f:
+        f.write("broken" + s)
+    result = runner.invoke(
+        cli, ["batch", "--features", "cns:cov,eeq", "--jobs", "2", str(tmpdir)]
+    )
+    assert result.exit_code == 0
+    lines = result.stdout.splitlines()
+    assert lines[0] == "file\tatom\telement\tcns:cov\teeq"
+    assert len(lines) == 1 + 11 + 2
+    assert lines[1].startswith(os.path.join(str(tmpdir), "a.xyz") + "\t0\tC")
+    assert lines[-1].startswith(os.path.join(str(tmpdir), "b.xyz") + "\t1\tH")
+    assert "c.xyz" in result.stderr
+
+
+def test_cli_batch_manifest(runner, tmpdir, pyridine_xyz):
+    manifest = os.path.join(str(tmpdir), "manifest.txt")
+    with open(manifest, "w") as f:
+        f.write("# structures" + s + pyridine_xyz + s)
+    result = runner.invoke(cli, ["batch", "--features", "vdw:truhlar", manifest])
+    assert result.exit_code == 0
+    assert len(result.stdout.splitlines()) == 12
+
+
+def test_cli_batch_coord(runner, tmpdir):
+    coord = os.path.join(str(tmpdir), "coord")
+    with open(coord, "w") as f:
+        f.write("$coord" + s)
+        f.write("    0.0    0.0   -1.06176434496059      c" + s)
+        f.write("    0.0    0.0    1.06176434496059      h" + s)
+        f.write("$end" + s)
+    result = runner.invoke(cli, ["batch", "--features", "cns:cov", coord])
+    assert result.exit_code == 0
+    assert len(result.stdout.splitlines()) == 1 + 2
+    assert "failed" not in result.stderr
+
+
+def test_cli_batch_all_failed(runner, tmpdir):
+    with open(os.path.join(str(tmpdir), "c.xyz"), "w") as f:
+        f.write("broken" + s)
+    result = runner.invoke(cli, ["batch", "--features", "cns", str(tmpdir)])
+    assert result.exit_code == 1
+
+
+def test_cli_batch_invalid_feature(runner, pyridine_xyz):
+    result = runner.invoke(cli, ["batch", "--features", "invalid", pyridine_xyz])
+    assert result.exit_code == 1
+
+
+def test_cli_batch_single_file(runner, pyridine_xyz):
+    result = runner.invoke(cli, ["batch", "--features", "prox", pyridine_xyz])
+    assert result.exit_code == 0
+    assert len(result.stdout.splitlines()) == 12
@@ -0,0 +1,47 @@
+# tests/test_cluster.py
+import numpy as np
+from tests.store import propanolIntermediate
+from tests.store import propanolLowest
+from tests.store import randomRotation
+
+from kallisto.cluster import clusterConformers
+from kallisto.cluster import getConformerDescriptors
+from kallisto.cluster import rmsdLowerBounds
+from kallisto.rmsd import getCenteredCoordinates
+from kallisto.rmsd import rmsdBatch
+
+
+def getConformers(rng, ncopies: int, scale: float) -> np.ndarray:
+    coords = []
+    for ref in (propanolLowest(), propanolIntermediate()):
+        coord = ref.get_positions()
+        for _ in range(ncopies):
+            q = randomRotation(rng)
+            noise = rng.normal(scale=scale, size=coord.shape)
+            coords.append((coord + noise) @ q)
+    return np.array(coords)
+
+
+def test_cluster_lower_bounds():
+    rng = np.random.default_rng(11)
+    coords = getConformers(rng, 5, 0.3)
+    x, _ = getCenteredCoordinates(coords)
+    singular, radial = getConformerDescriptors(x)
+    candidates = np.arange(1, len(coords))
+    bounds = rmsdLowerBounds(singular, radial, 0, candidates)
+    errors, _ = rmsdBatch(
+        np.broadcast_to(coords[0], coords[candidates].shape), coords[candidates]
+    )
+    assert np.all(bounds <= errors + 1e-10)
+
+
+def test_cluster_conformers():
+    rng = np.random.default_rng(13)
+    coords = getConformers(rng, 6, 0.01)
+    representatives, labels, evaluations = clusterConformers(coords, threshold=0.1)
+    assert np.array_equal(representatives, [0, 6])
+    assert np.array_equal(labels, [0] * 6 + [1] * 6)
+    # the second conformer type is rejected by the lower bounds
+    assert evaluations == 10
+    representatives, labels, _ = clusterConformers(coords, threshold=0.0)
+    assert np.array_equal(representatives, np.arange(12))
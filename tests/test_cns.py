@@ -1,6 +1,9 @@
 # tests/test_cns.py
 import numpy as np
 from tests.store import ch_radical
+from tests.store import iridiumCatalyst
+
+from kallisto.methods import getCoordinationNumbers
 
 
 def test_cns_exp_ch_radical():
@@ -25,3 +28,37 @@ def test_cns_cov_ch_radical():
     cns = mol.get_cns(cntype)
     assert np.isclose(cns[0], 0.9189476178185281)
     assert np.isclose(cns[1], 0.9189476178185281)
+
+
+def test_cns_vectorized_matches_loops():
+    mol = iridiumCatalyst()
+    at = mol.get_atomic_numbers()
+    coords = mol.get_positions()
+    for cntype in ("exp", "erf", "cov"):
+        want = getCoordinationNumbers(at, coords, cntype, 800.0, vectorized=False)
+        got = getCoordinationNumbers(at, coords, cntype, 800.0)
+        assert np.allclose(got, want, rtol=0, atol=1e-12)
+
+
+def test_cns_gradient_matches_finite_differences():
+    from kallisto.methods import getDenseGradient
+    from tests.store import pyridine
+
+    mol = pyridine()
+    at = mol.get_atomic_numbers()
+    coords = mol.get_positions()
+    nat = mol.get_number_of_atoms()
+    step = 1e-5
+    for cntype in ("exp", "erf", "cov"):
+        i, j, dcn = mol.get_cns_gradient(cntype)
+        got = getDenseGradient(nat, i, j, dcn)
+        for b in (0, 5):
+            for x in range(3):
+                plus, minus = coords.copy(), coords.copy()
+                plus[b, x] += step
+                minus[b, x] -= step
+                want = (
+                    getCoordinationNumbers(at, plus, cntype, 800.0)
+                    - getCoordinationNumbers(at, minus, cntype, 800.0)
+                ) / (2 * step)
+                assert np.allclose(got[:, b, x], want, atol=1e-8)
@@ -0,0 +1,115 @@
+# tests/test_dispersion.py
+import itertools
+
+import numpy as np
+from tests.store import iridiumCatalyst
+from tests.store import pyridine
+
+from kallisto.data.alpha import weights
+from kallisto.dispersion import getDispersionEnergies
+from kallisto.dispersion import getThreeBodyEnergies
+from kallisto.dispersion import getTriples
+from kallisto.neighbors import getNeighborList
+
+
+def test_dispersion_of_pyridine():
+    mol = pyridine()
+    energies = mol.get_dispersion(0)
+    assert energies.shape == (11,)
+    assert np.all(energies < 0.0)
+    twobody = getDispersionEnergies(
+        mol.get_positions(),
+        mol.get_alp(0, dynamic=True),
+        mol.get_vdw(0, "rahm", 1.0),
+        s9=0.0,
+    )
+    assert np.sum(energies) > np.sum(twobody)
+
+
+def test_triples_match_loops():
+    mol = iridiumCatalyst()
+    coords = mol.get_positions()
+    nat = mol.get_number_of_atoms()
+    i, j, r = getNeighborList(coords, 100.0)
+    ij, ik, jk = getTriples(nat, i, j)
+    # triples of two pair ranges add up to all triples
+    first = getTriples(nat, i, j, 0, 100)
+    second = getTriples(nat, i, j, 100, len(i))
+    for whole, a, b in zip((ij, ik, jk), first, second, strict=True):
+        assert np.array_equal(whole, np.concatenate((a, b)))
+    got = set(zip(i[ij].tolist(), j[ij].tolist(), j[ik].tolist(), strict=True))
+    assert np.all(i[jk] == j[ij])
+    pairs = set(zip(i.tolist(), j.tolist(), strict=True))
+    want = {
+        (a, b, c)
+        for a, b, c in itertools.combinations(range(nat), 3)
+        if (a, b) in pairs and (a, c) in pairs and (b, c) in pairs
+    }
+    assert got == want
+
+
+def test_three_body_energy_matches_loops():
+    mol = pyridine()
+    coords = mol.get_positions()
+    aw = mol.get_alp(0, dynamic=True)
+    radii = mol.get_vdw(0, "rahm", 1.0)
+    got = getThreeBodyEnergies(coords, aw, radii, 1.0, 0.4, 3.4, 1600.0)
+    c6 = 3.0 / np.pi * (aw * weights) @ aw.T
+    want = 0.0
+    for a, b, c in itertools.combinations(range(len(coords)), 3):
+        rab = np.linalg.norm(coords[a] - coords[b])
+        rac = np.linalg.norm(coords[a] - coords[c])
+        rbc = np.linalg.norm(coords[b] - coords[c])
+        va, vb = coords[b] - coords[a], coords[c] - coords[a]
+        cosa = va @ vb / (rab * rac)
+        va, vb = coords[a] - coords[b], coords[c] - coords[b]
+        cosb = va @ vb / (rab * rbc)
+        va, vb = coords[a] - coords[c], coords[b] - coords[c]
+        cosc = va @ vb / (rac * rbc)
+        r0 = [0.4 * (radii[x] + radii[y]) + 3.4 for x, y in ((a, b), (a, c), (b, c))]
+        damp = 1.0 / (1.0 + 6.0 * (np.prod(r0) / (rab * rac * rbc)) ** (16.0 / 3.0))
+        c9 = np.sqrt(c6[a, b] * c6[a, c] * c6[b, c])
+        want += c9 * (3.0 * cosa * cosb * cosc + 1.0) * damp / (rab * rac * rbc) ** 3
+    assert np.isclose(np.sum(got), want)
+
+
+def test_dispersion_shares_neighbor_list():
+    from kallisto.dispersion import getTwoBodyEnergies
+
+    mol = iridiumCatalyst()
+    coords = mol.get_positions()
+    aw = mol.get_alp(charge=0, dynamic=True)
+    radii = mol.get_vdw(charge=0, vdwtype="rahm", scale=1.0)
+    args = (coords, aw, radii, 1.0, 0.4, 3.4)
+    want = getTwoBodyEnergies(*args, 900.0) + getThreeBodyEnergies(*args, 400.0)
+    got = getDispersionEnergies(coords, aw, radii, threshold=900.0, thresholdATM=400.0)
+    assert np.allclose(got, want)
+    want = getTwoBodyEnergies(*args, 400.0) + getThreeBodyEnergies(*args, 900.0)
+    got = getDispersionEnergies(coords, aw, radii, threshold=400.0, thresholdATM=900.0)
+    assert np.allclose(got, want)
+
+
+def test_three_body_energy_in_blocks():
+    import tracemalloc
+
+    from kallisto.methods import getSparseC6Coefficients
+    from tests.store import tiledPyridine
+
+    # 1100 atoms with about 5.5M triple candidates
+    mol = pyridine()
+    coords = tiledPyridine((5, 5, 4), 12.0).get_positions()
+    aw = np.tile(mol.get_alp(0, dynamic=True), (100, 1))
+    radii = np.tile(mol.get_vdw(0, "rahm", 1.0), 100)
+    neighbors = getNeighborList(coords, 400.0)
+    _, _, c6 = getSparseC6Coefficients(aw, coords, 400.0, neighbors=neighbors)
+    args = (coords, aw, radii, 1.0, 0.4, 3.4, 400.0)
+
+    tracemalloc.start()
+    got = getThreeBodyEnergies(*args, neighbors=neighbors, c6=c6)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # all candidates at once need more than 300 MB
+    assert peak < 64e6
+
+    want = getThreeBodyEnergies(*args, neighbors=neighbors, c6=c6, chunk=4096)
+    assert np.allclose(got, want, rtol=1e-12, atol=0.0)
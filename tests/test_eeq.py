@@ -25,3 +25,135 @@ def test_eeq_anion():
     eeq = mol.get_eeq(charge)
     assert np.isclose(eeq[0], -0.94103071)
     assert np.isclose(eeq[1], -0.05896929)
+
+
+def test_eeq_symmetric_solver_matches_lagrangian_system():
+    from kallisto.methods import getEEQMatrix, getEEQVector, solveEEQ
+    from tests.store import pyridine
+
+    mol = pyridine()
+    at = mol.get_atomic_numbers()
+    A = getEEQMatrix(at, mol.get_positions())
+    X = getEEQVector(at, mol.get_cns(cntype="cov"))
+    B = np.ones(shape=(12, 12))
+    B[:11, :11] = A
+    B[11, 11] = 0.0
+    want = np.linalg.solve(B, np.append(X, 1.0))[:11]
+    assert np.allclose(A, A.T)
+    assert np.allclose(solveEEQ(A, X, 1), want)
+    assert np.isclose(np.sum(mol.get_eeq(1)), 1.0)
+
+
+def test_eeq_solver_falls_back_for_indefinite_matrix():
+    from kallisto.methods import solveEEQ
+
+    A = np.array([[1.0, 2.0], [2.0, 1.0]])
+    X = np.array([1.0, 0.0])
+    got = solveEEQ(A, X, 0)
+    assert np.allclose(got, [-0.5, 0.5])
+
+
+def test_eeq_scan_reuses_factorization():
+    mol = ch_radical()
+    factorization = mol.get_eeq_factorization()
+    qs = mol.get_eeq_scan([-1, 0, 1])
+    assert qs.shape == (3, 2)
+    assert np.allclose(qs[0], [-0.94103071, -0.05896929])
+    assert np.allclose(qs[2], [0.59769359, 0.40230641])
+    assert mol.get_eeq_factorization() is factorization
+    assert np.allclose(mol.get_eeq(0), qs[1])
+    assert np.allclose(mol.get_alp(charge=1), ch_radical().get_alp(charge=1))
+
+
+def test_eeq_factorization_with_several_right_hand_sides():
+    from kallisto.eeq import EEQFactorization
+
+    A = np.array([[1.0, 2.0], [2.0, 1.0]])
+    X = np.array([[1.0, 0.0], [0.0, 1.0]])
+    got = EEQFactorization(A).get_charges(X, [0, 1])
+    assert np.allclose(got, [[-0.5, 0.5], [1.0, 0.0]])
+
+
+def test_eeq_conjugate_gradient_matches_direct_solver():
+    from tests.store import pyridine
+
+    mol = pyridine()
+    want = mol.get_eeq(1)
+    got = mol.get_eeq(1, solver="cg")
+    assert np.allclose(got, want, atol=1e-6)
+
+
+def test_eeq_conjugate_gradient_on_tiled_system():
+    from kallisto.methods import getAtomicPartialCharges
+    from kallisto.methods import getCoordinationNumbers
+    from tests.store import tiledPyridine
+
+    mol = tiledPyridine((4, 4, 2), 14.0)
+    at = mol.get_atomic_numbers()
+    coords = mol.get_positions()
+    cns = getCoordinationNumbers(at, coords, "cov", 800.0)
+    want = getAtomicPartialCharges(at, coords, cns, 0)
+    got = getAtomicPartialCharges(at, coords, cns, 0, solver="cg", tol=1e-10)
+    assert np.isclose(np.sum(got), 0.0)
+    assert np.allclose(got, want, atol=1e-6)
+
+
+def test_eeq_operator_memory_against_dense_matrix():
+    import tracemalloc
+
+    from kallisto.eeq import EEQOperator
+    from kallisto.methods import getEEQMatrix
+    from tests.store import tiledPyridine
+
+    # 3080 atoms, the dense matrix alone needs 76 MB
+    mol = tiledPyridine((7, 8, 5), 14.0)
+    at = mol.get_atomic_numbers()
+    coords = mol.get_positions()
+    V = np.random.default_rng(0).normal(size=(len(at), 2))
+
+    tracemalloc.start()
+    got = EEQOperator(at, coords).matvec(V)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert peak < 0.5 * len(at) ** 2 * 8
+
+    tracemalloc.start()
+    A = getEEQMatrix(at, coords)
+    _, dense = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert peak < 0.25 * dense
+    assert np.allclose(got, A @ V, rtol=1e-12, atol=1e-12)
+
+
+def test_eeq_unknown_solver():
+    import pytest
+    from kallisto.methods import getAtomicPartialCharges
+
+    mol = ch_radical()
+    with pytest.raises(ValueError):
+        getAtomicPartialCharges(
+            mol.get_atomic_numbers(), mol.get_positions(), [1.0, 1.0], 0, solver="x"
+        )
+
+
+def test_eeq_gradient_matches_finite_differences():
+    from kallisto.molecule import Molecule
+    from tests.store import pyridine
+
+    mol = pyridine()
+    at = mol.get_atomic_numbers()
+    coords = mol.get_positions()
+    step = 1e-5
+    for charge in (0, 1):
+        got = mol.get_eeq_gradient(charge)
+        assert np.allclose(np.sum(got, axis=0), 0.0)
+        for b in (0, 5):
+            for x in range(3):
+                plus, minus = coords.copy(), coords.copy()
+                plus[b, x] += step
+                minus[b, x] -= step
+                want = (
+                    Molecule(numbers=at, positions=plus).get_eeq(charge)
+                    - Molecule(numbers=at, positions=minus).get_eeq(charge)
+                ) / (2 * step)
+                assert np.allclose(got[:, b, x], want, atol=1e-8)
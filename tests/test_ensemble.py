@@ -0,0 +1,86 @@
+# tests/test_ensemble.py
+import numpy as np
+import pytest
+from tests.store import ch_radical
+from tests.store import iridiumCatalyst
+from tests.store import propanolIntermediate
+from tests.store import propanolLowest
+from tests.store import pyridine
+
+from kallisto.ensemble import MoleculeBatch
+from kallisto.ensemble import MoleculeEnsemble
+from kallisto.molecule import Molecule
+
+
+def conformers():
+    rng = np.random.default_rng(7)
+    ref = pyridine()
+    at = ref.get_atomic_numbers()
+    xyz = ref.get_positions()
+    return [
+        Molecule(numbers=at, positions=xyz + rng.normal(0.0, 0.1, size=xyz.shape))
+        for _ in range(4)
+    ]
+
+
+def test_ensemble_matches_molecules():
+    molecules = conformers()
+    ensemble = MoleculeEnsemble.from_molecules(molecules)
+    assert ensemble.get_number_of_conformers() == 4
+    cns = ensemble.get_cns("exp")
+    prox = ensemble.get_prox((2, 3))
+    eeq = ensemble.get_eeq(1)
+    alp = ensemble.get_alp(1)
+    vdw = ensemble.get_vdw(1, "truhlar", 1.0)
+    for k, mol in enumerate(molecules):
+        assert np.allclose(cns[k], mol.get_cns("exp"))
+        assert np.allclose(prox[k], mol.get_prox((2, 3)))
+        assert np.allclose(eeq[k], mol.get_eeq(1))
+        assert np.allclose(alp[k], mol.get_alp(1))
+        assert np.allclose(vdw[k], mol.get_vdw(1, "truhlar", 1.0))
+
+
+def test_ensemble_with_different_conformers():
+    molecules = [propanolLowest(), propanolIntermediate()]
+    ensemble = MoleculeEnsemble.from_molecules(molecules)
+    eeq = ensemble.get_eeq(0)
+    assert eeq.shape == (2, 12)
+    assert np.allclose(eeq[1], molecules[1].get_eeq(0))
+    assert np.allclose(np.sum(eeq, axis=1), 0.0)
+
+
+def test_ensemble_rejects_different_topologies():
+    with pytest.raises(ValueError):
+        MoleculeEnsemble.from_molecules([pyridine(), propanolLowest()])
+
+
+def test_batch_of_different_molecules():
+    molecules = [pyridine(), ch_radical(), propanolLowest(), iridiumCatalyst()]
+    charges = [0, 1, -1, 0]
+    batch = MoleculeBatch.from_molecules(molecules, width=8)
+    assert batch.get_number_of_molecules() == 4
+    cns = batch.get_cns("cov")
+    prox = batch.get_prox((2, 3))
+    eeq = batch.get_eeq(charges)
+    alp = batch.get_alp(charges)
+    vdw = batch.get_vdw(charges, "rahm", 1.0)
+    for k, mol in enumerate(molecules):
+        nat = mol.get_number_of_atoms()
+        assert len(cns[k]) == nat
+        assert np.allclose(cns[k], mol.get_cns("cov"))
+        assert np.allclose(prox[k], mol.get_prox((2, 3)))
+        assert np.allclose(eeq[k], mol.get_eeq(charges[k]))
+        assert np.allclose(alp[k], mol.get_alp(charges[k]))
+        assert np.allclose(vdw[k], mol.get_vdw(charges[k], "rahm", 1.0))
+
+
+def test_dynamic_polarizabilities_of_ensemble_and_batch():
+    molecules = conformers()
+    alpiw = MoleculeEnsemble.from_molecules(molecules).get_alp(0, dynamic=True)
+    assert alpiw.shape == (4, 11, 23)
+    batch = MoleculeBatch.from_molecules([pyridine(), ch_radical()], width=8)
+    batched = batch.get_alp(0, dynamic=True)
+    assert batched[1].shape == (2, 23)
+    for k, mol in enumerate(molecules):
+        assert np.allclose(alpiw[k], mol.get_alp(0, dynamic=True))
+    assert np.allclose(batched[0], pyridine().get_alp(0, dynamic=True))
@@ -0,0 +1,50 @@
+# tests/test_features.py
+import numpy as np
+import pytest
+from tests.store import pyridine
+
+import kallisto
+from kallisto.features import getFeaturePlan
+
+
+def test_compute_matches_molecule_methods():
+    features = ["cns:cov", "eeq", "alp", "vdw:rahm", "prox", "bonds"]
+    got = kallisto.compute(pyridine(), features=features, charge=1)
+    mol = pyridine()
+    assert np.allclose(got["cns:cov"], mol.get_cns("cov"))
+    assert np.allclose(got["eeq"], mol.get_eeq(1))
+    assert np.allclose(got["alp"], mol.get_alp(1))
+    assert np.allclose(got["vdw:rahm"], mol.get_vdw(1, "rahm", 1.0))
+    assert np.allclose(got["prox"], mol.get_prox((2, 3)))
+    assert got["bonds"] == mol.get_bonds()
+
+
+def test_compute_homoatomic_c6():
+    got = kallisto.compute(pyridine(), features=["c6", "alp"])
+    c6 = pyridine().get_c6(0)
+    assert np.allclose(got["c6"], np.diagonal(c6))
+
+
+def test_shared_intermediates_are_planned_once():
+    plan = getFeaturePlan(["vdw:truhlar", "eeq", "cns:cov", "cns"])
+    assert plan == [
+        ("pairs",),
+        ("cns", "cov"),
+        ("eeq",),
+        ("alpiw",),
+        ("alp",),
+        ("vdw", "truhlar"),
+        ("cns", "erf"),
+    ]
+
+
+def test_unknown_feature_is_rejected():
+    with pytest.raises(ValueError):
+        kallisto.compute(pyridine(), features=["cns:invalid"])
+    with pytest.raises(ValueError):
+        kallisto.compute(pyridine(), features=["invalid"])
+
+
+def test_compute_dispersion():
+    got = kallisto.compute(pyridine(), features=["disp"])
+    assert np.allclose(got["disp"], pyridine().get_dispersion(0))
@@ -0,0 +1,42 @@
+# tests/test_incremental.py
+import numpy as np
+from tests.store import pyridine
+
+from kallisto.incremental import IncrementalEvaluator
+from kallisto.molecule import Molecule
+
+
+def test_incremental_update_matches_full_evaluation():
+    mol = pyridine()
+    at = mol.get_atomic_numbers()
+    coords = mol.get_positions()
+    evaluator = IncrementalEvaluator.from_molecule(mol, charge=1)
+    rng = np.random.default_rng(7)
+    for _ in range(5):
+        coords = coords.copy()
+        coords[rng.choice(len(at), size=2, replace=False)] += rng.normal(
+            scale=0.2, size=(2, 3)
+        )
+        evaluator.set_positions(coords)
+        want = Molecule(numbers=at, positions=coords)
+        assert np.allclose(evaluator.get_cns(), want.get_cns(cntype="cov"))
+        assert np.allclose(evaluator.get_eeq(), want.get_eeq(1))
+    assert evaluator.updates == 5
+    assert np.allclose(evaluator.A, evaluator.A.T)
+
+
+def test_incremental_rebuild_for_many_moved_atoms():
+    mol = pyridine()
+    evaluator = IncrementalEvaluator.from_molecule(mol, refresh=1)
+    coords = mol.get_positions() + 0.1
+    evaluator.set_positions(coords)
+    assert evaluator.updates == 0
+    coords[0] -= 0.1
+    evaluator.set_positions(coords)
+    assert evaluator.updates == 1
+    coords[1] -= 0.1
+    evaluator.set_positions(coords)
+    assert evaluator.updates == 0
+    want = Molecule(numbers=mol.get_atomic_numbers(), positions=coords)
+    assert np.allclose(evaluator.get_eeq(), want.get_eeq(0))
+    assert np.allclose(evaluator.get_molecule().get_positions(), coords)
@@ -19,3 +19,41 @@ def test_lig_neopentane():
     assert 6 in substructures[1]
     assert 8 in substructures[2]
     assert 12 in substructures[3]
+
+
+def test_lig_long_chain():
+    from kallisto.rmsd import getLigands
+
+    # linear chain far beyond the recursion limit
+    nat = 5000
+    bonds = [[i - 1, i + 1] for i in range(nat)]
+    bonds[0], bonds[-1] = [1], [nat - 2]
+    substructures = recursiveGetSubstructures(nat, bonds, 0)  # type: ignore
+    assert substructures == [list(range(1, nat))]
+    ligands = getLigands(nat, bonds, [0, 2500])
+    assert ligands[0] == [list(range(1, 2500))]
+    assert ligands[1] == [list(range(2499, 0, -1)), list(range(2501, nat))]
+
+
+def test_lig_ring():
+    from kallisto.rmsd import getLigands
+
+    # ring of six atoms with one substituent at atom 3
+    bonds = [[1, 5], [0, 2], [1, 3], [2, 4, 6], [3, 5], [0, 4], [3]]
+    substructures = recursiveGetSubstructures(7, bonds, 0)  # type: ignore
+    assert substructures == [[1, 2, 3, 4, 5, 6], [5, 4, 3, 2, 1, 6]]
+    # the chelating ring is listed once
+    assert getLigands(7, bonds, 0) == [[[1, 2, 3, 4, 5, 6]]]
+
+
+def test_lig_bridged_centers():
+    from kallisto.rmsd import getLigands
+
+    # two centers (0 and 3) bridged by the ligand 1-2, terminal ligand 4
+    bonds = [[1], [0, 2], [1, 3], [2, 4], [3]]
+    ligands = getLigands(5, bonds, [0, 3])
+    assert ligands[0] == [[1, 2]]
+    assert ligands[1] == [[2, 1], [4]]
+    # a single center keeps the other one
+    assert getLigands(5, bonds, 0) == [[[1, 2, 3, 4]]]
+    assert getLigands(5, bonds, 3)[0] == recursiveGetSubstructures(5, bonds, 3)
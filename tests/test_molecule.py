@@ -120,3 +120,65 @@ def test_user_can_get_number_of_atoms():
     reference = Molecule(atoms)
     nat = reference.get_number_of_atoms()
     assert nat == 3
+
+
+def test_derived_features_are_computed_once(monkeypatch):
+    import kallisto.methods
+
+    calls = []
+    getCoordinationNumbers = kallisto.methods.getCoordinationNumbers
+
+    def counter(*args, **kwargs):
+        calls.append(args[2])
+        return getCoordinationNumbers(*args, **kwargs)
+
+    monkeypatch.setattr(kallisto.methods, "getCoordinationNumbers", counter)
+    molecule = Molecule(atoms)
+    vdw = molecule.get_vdw(charge=0, vdwtype="rahm", scale=1.0)
+    molecule.get_eeq(charge=0)
+    molecule.get_alp(charge=0)
+    assert calls == ["cov"]
+    assert np.array_equal(molecule.get_vdw(0, "rahm", 1.0), vdw)
+
+
+def test_cache_is_invalidated_by_set_array():
+    molecule = Molecule(atoms)
+    cns = molecule.get_cns(cntype="cov")
+    positions = molecule.get_positions() * 2.0
+    molecule.set_array("positions", positions)
+    assert not np.allclose(molecule.get_cns(cntype="cov"), cns)
+    want = Molecule(numbers=[1, 1, 1], positions=positions).get_cns(cntype="cov")
+    assert np.allclose(molecule.get_cns(cntype="cov"), want)
+
+
+def test_cached_features_are_returned_as_copies():
+    molecule = Molecule(atoms)
+    eeq = molecule.get_eeq(charge=0)
+    eeq[:] = 0.0
+    assert not np.allclose(molecule.get_eeq(charge=0), 0.0)
+
+
+def test_positions_are_returned_as_copies():
+    molecule = Molecule(atoms)
+    cns = molecule.get_cns(cntype="cov")
+    positions = molecule.get_positions()
+    positions *= 2.0
+    assert not np.allclose(molecule.get_positions(), positions)
+    assert np.allclose(molecule.get_cns(cntype="cov"), cns)
+
+
+def test_molecular_c6_is_cached(monkeypatch):
+    import kallisto.methods
+
+    calls = []
+    getMolecularC6 = kallisto.methods.getMolecularC6
+
+    def counter(*args, **kwargs):
+        calls.append(1)
+        return getMolecularC6(*args, **kwargs)
+
+    monkeypatch.setattr(kallisto.methods, "getMolecularC6", counter)
+    molecule = Molecule(atoms)
+    c6 = molecule.get_molecular_c6(charge=0)
+    assert molecule.get_molecular_c6(charge=0) == c6
+    assert calls == [1]
@@ -0,0 +1,49 @@
+# tests/test_neighbors.py
+import numpy as np
+from tests.store import iridiumCatalyst
+
+from kallisto.methods import getCoordinationNumbers
+from kallisto.neighbors import getNeighborList
+
+
+def test_neighbor_list_matches_brute_force():
+    rng = np.random.default_rng(42)
+    coords = rng.uniform(0.0, 60.0, size=(300, 3))
+    threshold = 100.0
+    i, j, r = getNeighborList(coords, threshold)
+    diff = coords[np.newaxis, :, :] - coords[:, np.newaxis, :]
+    rSquared = np.einsum("ijk,ijk->ij", diff, diff)
+    want = np.argwhere(np.triu(rSquared <= threshold, k=1))
+    assert np.array_equal(np.column_stack((i, j)), want)
+    assert np.allclose(r, np.sqrt(rSquared[i, j]))
+
+
+def test_neighbor_list_single_atom():
+    i, j, r = getNeighborList(np.zeros(shape=(1, 3)), 800.0)
+    assert len(i) == len(j) == len(r) == 0
+
+
+def test_neighbor_list_can_be_shared():
+    mol = iridiumCatalyst()
+    at = mol.get_atomic_numbers()
+    coords = mol.get_positions()
+    neighbors = getNeighborList(coords, 800.0)
+    got = getCoordinationNumbers(at, coords, "cov", 800.0, neighbors=neighbors)
+    want = getCoordinationNumbers(at, coords, "cov", 800.0, vectorized=False)
+    assert np.allclose(got, want)
+
+
+def test_neighbor_counts_without_pairs():
+    from kallisto.methods import getProximityShells
+    from kallisto.molecule import Molecule
+
+    at = np.array([6, 6])
+    coords = np.array([[0.0, 0.0, 0.0], [100.0, 0.0, 0.0]])
+    for cntype in ("cov", "erf", "exp"):
+        cns = getCoordinationNumbers(at, coords, cntype, 800.0)
+        assert cns.dtype == np.float64
+        assert np.array_equal(cns, np.zeros(2))
+    prox = getProximityShells(at, coords, (2, 3), 800.0)
+    assert prox.dtype == np.float64
+    mol = Molecule(numbers=at, positions=coords)
+    assert mol.get_cns("cov").dtype == np.float64
@@ -1,8 +1,12 @@
 # tests/test_rms.py
 import numpy as np
+import pytest
 from tests.store import propanolIntermediate
 from tests.store import propanolLowest
+from tests.store import pyridine
+from tests.store import randomRotation
 
+from kallisto.molecule import Molecule
 from kallisto.rmsd import rmsd
 
 
@@ -22,3 +26,116 @@ def test_rms():
     assert np.isclose(u[2, 0], 0.18181471)
     assert np.isclose(u[2, 1], -0.07012604)
     assert np.isclose(u[2, 2], 0.98082911)
+
+
+def test_rms_batch_matches_single_pairs():
+    from kallisto.rmsd import rmsdBatch
+
+    rng = np.random.default_rng(3)
+    coord1 = propanolLowest().get_positions()
+    coord2 = propanolIntermediate().get_positions()
+    nat = len(coord1)
+    stack1, stack2 = [], []
+    for _ in range(8):
+        q = randomRotation(rng)
+        stack1.append(coord1 + rng.normal(scale=0.1, size=coord1.shape))
+        stack2.append(coord2 @ q)
+    errors, us = rmsdBatch(np.array(stack1), np.array(stack2))
+    assert errors.shape == (8,)
+    assert us.shape == (8, 3, 3)
+    for k in range(8):
+        error, u = rmsd(nat, stack1[k], stack2[k])
+        assert np.isclose(errors[k], error[0])
+        assert np.allclose(us[k], u)
+        assert np.allclose(us[k] @ us[k].T, np.eye(3))
+
+
+def test_rms_matrix(tmpdir):
+    import os
+
+    from scipy.spatial import distance
+
+    from kallisto.rmsd import rmsdBatch
+    from kallisto.rmsd import rmsdMatrix
+
+    rng = np.random.default_rng(5)
+    coord = propanolLowest().get_positions()
+    coords = np.array(
+        [coord + rng.normal(scale=0.2, size=coord.shape) for _ in range(7)]
+    )
+    i, j = np.triu_indices(7, k=1)
+    ref, _ = rmsdBatch(coords[i], coords[j])
+    assert np.allclose(rmsdMatrix(coords), ref)
+    assert np.allclose(rmsdMatrix(coords, chunk=4), ref)
+    fn = os.path.join(str(tmpdir), "rmsd.npy")
+    rmsdMatrix(coords, out=fn, jobs=2, chunk=5)
+    square = distance.squareform(np.load(fn))
+    assert np.allclose(square[i, j], ref)
+    assert np.allclose(np.diag(square), 0.0)
+
+
+def test_rms_reorder():
+    from kallisto.rmsd import rmsdReorder
+
+    rng = np.random.default_rng(7)
+    mol1 = propanolLowest()
+    coord = mol1.get_positions()
+    at = mol1.get_atomic_numbers()
+    nat = len(at)
+    q = randomRotation(rng)
+    shuffle = rng.permutation(nat)
+    mol2 = Molecule(numbers=at[shuffle], positions=coord[shuffle] @ q + 1.0)
+    error, u, perm = rmsdReorder(mol1, mol2)
+    assert np.isclose(error, 0.0, atol=1e-6)
+    assert np.array_equal(shuffle[perm], np.arange(nat))
+    ref, refu = rmsd(nat, coord, mol2.get_positions()[perm])
+    assert np.isclose(ref[0], error)
+    assert np.allclose(refu, u)
+    # without bond graph pruning
+    error, _, _ = rmsdReorder(mol1, mol2, bonds=False)
+    assert np.isclose(error, 0.0, atol=1e-6)
+    with pytest.raises(ValueError):
+        rmsdReorder(mol1, mol2, maxiter=0)
+    # never worse than the given ordering
+    error, _, _ = rmsdReorder(mol1, propanolIntermediate())
+    ref, _ = rmsd(nat, coord, propanolIntermediate().get_positions())
+    assert error <= ref[0] + 1e-8
+
+
+def test_rms_reorder_composition():
+    from kallisto.rmsd import rmsdReorder
+
+    mol = pyridine()
+    at = mol.get_atomic_numbers()
+    at[0] = 9
+    other = Molecule(numbers=at, positions=mol.get_positions())
+    with pytest.raises(ValueError):
+        rmsdReorder(mol, other)
+
+
+def test_rms_align_trajectory():
+    from kallisto.rmsd import alignTrajectory
+    from kallisto.units import Bohr
+
+    rng = np.random.default_rng(17)
+    mol = propanolLowest()
+    at = mol.get_atomic_numbers()
+    coord = mol.get_positions()
+    frames = []
+    for _ in range(7):
+        q = randomRotation(rng)
+        noise = rng.normal(scale=0.05, size=coord.shape)
+        frames.append((at, (coord + noise) @ q + rng.normal(size=3)))
+    # collected chunks are not overwritten by later ones
+    chunks = list(alignTrajectory(mol, iter(frames), chunk=3))
+    assert [len(errors) for _, errors in chunks] == [3, 3, 1]
+    positions = np.concatenate([p for p, _ in chunks])
+    errors = np.concatenate([e for _, e in chunks])
+    for k, (_, xyz) in enumerate(frames):
+        ref, _ = rmsd(len(at), coord, xyz)
+        assert np.isclose(errors[k], ref[0])
+    # aligned frames are superimposed onto the reference
+    deviation = np.sqrt(np.mean(np.sum((positions - coord) ** 2, axis=-1), axis=-1))
+    assert np.allclose(deviation * Bohr, errors)
+    with pytest.raises(ValueError):
+        list(alignTrajectory(mol, iter([(at[::-1], coord)])))
@@ -1,10 +1,14 @@
 # tests/test_strucreader.py
 import os
 
+import numpy as np
+
 import kallisto.reader.strucreader as ksr
 from kallisto.atom import Atom
 from kallisto.reader.turbomole import read as tmreader
+from kallisto.reader.turbomole import readArrays as tmArrays
 from kallisto.reader.xyz import read as xyzreader
+from kallisto.reader.xyz import readArrays as xyzArrays
 
 # define global lineseperator
 s = os.linesep
@@ -47,3 +51,94 @@ def test_user_finds_coordnates_in_coord(ch_coord_2):
     atoms = tmreader(fname)
     fname.close()
     assert len(atoms) == 2
+
+
+def test_user_can_read_xyz_arrays(pyridine_xyz):
+    with open(pyridine_xyz) as fname:
+        numbers, positions = xyzArrays(fname)
+    with open(pyridine_xyz) as fname:
+        atoms = xyzreader(fname)
+    assert numbers.shape == (11,)
+    assert positions.shape == (11, 3)
+    assert list(numbers) == [atom.get("number") for atom in atoms]
+    assert np.allclose(positions, [atom.get("position") for atom in atoms])
+
+
+def test_read_xyz_arrays_stops_after_first_frame(tmpdir, pyridine_xyz):
+    import pytest
+
+    fn = os.path.join(str(tmpdir), "trajectory.xyz")
+    with open(pyridine_xyz) as f:
+        frame = f.read()
+    with open(fn, "w") as f:
+        f.write(frame + frame)
+    with open(fn) as fname:
+        numbers, _ = xyzArrays(fname)
+        # the second frame is left unread
+        assert int(fname.readline()) == 11
+    assert numbers.shape == (11,)
+
+    empty = os.path.join(str(tmpdir), "empty.xyz")
+    open(empty, "w").close()
+    with open(empty) as fname:
+        with pytest.raises(IndexError):
+            xyzArrays(fname)
+
+
+def test_user_can_read_coord_arrays(ch_coord_ignore):
+    with open(ch_coord_ignore) as fname:
+        numbers, positions = tmArrays(fname)
+    assert list(numbers) == [6, 1]
+    assert positions[1][2] == 1.06176434496059
+
+
+def test_construct_molecule_from_arrays(fluoromethane_coord):
+    molecule = ksr.constructMolecule(geometry=fluoromethane_coord, out=None)
+    assert list(molecule.get_atomic_numbers()) == [6, 9, 1, 1, 1]
+    assert molecule.get_positions()[1][0] == 4.43543289
+
+
+def test_file_type_is_detected_from_head():
+    assert ksr.getFileType("mol.xyz", "") == "xyz"
+    assert ksr.getFileType("coord", "test" + s + "$coord" + s) == "turbomole"
+    assert ksr.getFileType("mol.dat", "2" + s + "comment" + s) == "xyz"
+    assert ksr.getFileType("mol.dat", "unknown" + s) == "unknown"
+
+
+def test_read_xyz_without_extension(tmpdir, pyridine_xyz):
+    fn = os.path.join(str(tmpdir), "pyridine.dat")
+    with open(pyridine_xyz) as src, open(fn, "w") as dst:
+        dst.write(src.read())
+    os.chmod(fn, 0o444)
+    molecule = ksr.constructMolecule(geometry=fn, out=None)
+    assert molecule.get_number_of_atoms() == 11
+
+
+def test_read_keeps_file_object_open(ch_coord_2):
+    with open(ch_coord_2) as fileObject:
+        numbers, _ = ksr.readArrays(fileObject)
+        assert not fileObject.closed
+    assert list(numbers) == [6, 1]
+
+
+def test_iterate_frames_of_xyz_trajectory(tmpdir, pyridine_xyz, ch_radical_xyz):
+    fn = os.path.join(str(tmpdir), "trajectory.xyz")
+    with open(pyridine_xyz) as a, open(ch_radical_xyz) as b:
+        pyridine, radical = a.read(), b.read()
+    with open(fn, "w") as f:
+        f.write(pyridine + pyridine + radical)
+    with open(fn) as fileObject:
+        frames = list(ksr.iterArrays(fileObject))
+    assert [len(numbers) for numbers, _ in frames] == [11, 11, 2]
+    assert frames[0][0] is frames[1][0]
+    assert np.allclose(frames[0][1], frames[1][1])
+    molecule = ksr.constructMolecule(geometry=pyridine_xyz, out=None)
+    assert np.allclose(frames[0][1], molecule.get_positions())
+    molecules = list(ksr.iterMolecules(fn))
+    assert list(molecules[2].get_atomic_numbers()) == [6, 1]
+
+
+def test_iterate_frames_of_coord(ch_coord):
+    molecules = list(ksr.iterMolecules(ch_coord))
+    assert len(molecules) == 1
+    assert list(molecules[0].get_atomic_numbers()) == [6, 1]